@@ -1,12 +1,11 @@
 import streamlit as st
-import requests
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta, date
-import json
-import io
-import base64
+from datetime import timedelta, date
+import importlib
+import os
+
+from tsheets_api import CURRENT_USER_ENDPOINT
+from app_state import api_request, start_sync, finish_sync, reconcile_writes, follow_dataset, get_reference_options
+from instrumentation import start_metrics_server
 
 # Page configuration
 st.set_page_config(
@@ -16,12 +15,22 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- API Configuration ---
-BASE_URL = "https://rest.tsheets.com/api/v1"
-TIMESHEETS_ENDPOINT = f"{BASE_URL}/timesheets"
-JOBS_ENDPOINT = f"{BASE_URL}/jobcodes"
-USERS_ENDPOINT = f"{BASE_URL}/users"
-REPORTS_ENDPOINT = f"{BASE_URL}/reports"
+# Set TSHEETS_ADMIN=1 to show the Performance view; set TSHEETS_METRICS_PORT to
+# serve the same metrics for Prometheus at http://<host>:<port>/metrics
+ADMIN_ENABLED = os.environ.get("TSHEETS_ADMIN") == "1"
+if os.environ.get("TSHEETS_METRICS_PORT"):
+    start_metrics_server(int(os.environ["TSHEETS_METRICS_PORT"]))
+
+# Each view lives in its own module, imported the first time the view is shown,
+# so the login page and the sidebar never load pandas, Plotly or the exporters
+VIEW_MODULES = {
+    "Dashboard": "view_dashboard",
+    "View Timesheets": "view_timesheets",
+    "Add Entry": "view_add_entry",
+    "Edit Entry": "view_edit_entry",
+    "Reports": "view_reports",
+    "Performance": "view_performance"
+}
 
 # --- Custom CSS ---
 st.markdown("""
@@ -88,6 +97,8 @@ st.markdown("""
 # --- Session State Initialization ---
 if 'auth_token' not in st.session_state:
     st.session_state.auth_token = None
+if 'account_id' not in st.session_state:
+    st.session_state.account_id = None
 if 'timesheets' not in st.session_state:
     st.session_state.timesheets = []
 if 'users' not in st.session_state:
@@ -102,122 +113,41 @@ if 'selected_user' not in st.session_state:
     st.session_state.selected_user = "all"
 if 'selected_jobcode' not in st.session_state:
     st.session_state.selected_jobcode = "all"
-if 'loading' not in st.session_state:
-    st.session_state.loading = False
-
-# --- Utility Functions ---
-def api_request(method, url, params=None, data=None):
-    """Make an API request to TSheets with proper error handling"""
-    headers = {
-        "Authorization": f"Bearer {st.session_state.auth_token}",
-        "Content-Type": "application/json"
-    }
-   
-    try:
-        with st.spinner("Processing request..."):
-            response = requests.request(method, url, headers=headers, params=params, json=data)
-           
-        if response.status_code == 401:
-            st.error("Authentication failed. Please check your API token.")
-            return None
-           
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        error_msg = f"API Error: {str(e)}"
-        if hasattr(e, 'response') and e.response is not None:
-            try:
-                error_data = e.response.json()
-                if 'error' in error_data and 'message' in error_data['error']:
-                    error_msg = f"API Error: {error_data['error']['message']}"
-            except:
-                pass
-        st.error(error_msg)
-        return None
-
-def load_data():
-    """Load all necessary data from TSheets API"""
-    st.session_state.loading = True
-   
-    # Get users
-    users_data = api_request("GET", USERS_ENDPOINT, params={"active": "yes"})
-    if users_data and 'results' in users_data and 'users' in users_data['results']:
-        st.session_state.users = {
-            str(user_id): user_data
-            for user_id, user_data in users_data['results']['users'].items()
-        }
-   
-    # Get job codes
-    jobs_data = api_request("GET", JOBS_ENDPOINT, params={"active": "yes"})
-    if jobs_data and 'results' in jobs_data and 'jobcodes' in jobs_data['results']:
-        st.session_state.jobcodes = {
-            str(job_id): job_data
-            for job_id, job_data in jobs_data['results']['jobcodes'].items()
-        }
-   
-    # Get timesheets
-    start_date, end_date = st.session_state.date_range
-    params = {
-        "start_date": start_date.isoformat(),
-        "end_date": end_date.isoformat(),
-        "supplemental_data": "yes"
-    }
-   
-    if st.session_state.selected_user != "all":
-        params["user_ids"] = st.session_state.selected_user
-       
-    if st.session_state.selected_jobcode != "all":
-        params["jobcode_ids"] = st.session_state.selected_jobcode
-   
-    data = api_request("GET", TIMESHEETS_ENDPOINT, params=params)
-    if data and 'results' in data and 'timesheets' in data['results']:
-        st.session_state.timesheets = list(data['results']['timesheets'].values())
-    else:
-        st.session_state.timesheets = []
-   
-    st.session_state.loading = False
-
-def create_timesheet(entry):
-    """Create a new timesheet entry"""
-    payload = {"data": [entry]}
-    return api_request("POST", TIMESHEETS_ENDPOINT, data=payload)
-
-def update_timesheet(entry_id, updates):
-    """Update an existing timesheet entry"""
-    payload = {"data": [{"id": entry_id, **updates}]}
-    return api_request("PUT", TIMESHEETS_ENDPOINT, data=payload)
 
-def delete_timesheet(entry_id):
-    """Delete a timesheet entry"""
-    payload = {"data": [{"id": entry_id}]}
-    return api_request("DELETE", TIMESHEETS_ENDPOINT, data=payload)
-
-def get_user_name(user_id):
-    """Get user name from user ID"""
-    user_id = str(user_id)
-    if user_id in st.session_state.users:
-        return f"{st.session_state.users[user_id]['first_name']} {st.session_state.users[user_id]['last_name']}"
-    return f"User {user_id}"
-
-def get_jobcode_name(jobcode_id):
-    """Get job code name from job code ID"""
-    jobcode_id = str(jobcode_id)
-    if jobcode_id in st.session_state.jobcodes:
-        return st.session_state.jobcodes[jobcode_id]['name']
-    return f"Job {jobcode_id}"
+@st.fragment(run_every=1)
+def sync_status():
+    """Show the progress of the background sync and rerun the app once it is done"""
+    job = st.session_state.get('sync_job')
+    if job is None:
+        return
+    if job.done:
+        st.rerun()
+    progress = job.progress.snapshot()
+    st.progress(
+        progress['fraction'],
+        text=(
+            f"🔄 {progress['stage']}... {progress['pages']} pages, "
+            f"{progress['rows_fetched']} rows fetched, {progress['rows_merged']} merged"
+        )
+    )
 
-def format_duration(seconds):
-    """Format duration in seconds to hours and minutes"""
-    hours, remainder = divmod(seconds, 3600)
-    minutes, _ = divmod(remainder, 60)
-    return f"{int(hours)}h {int(minutes)}m"
+@st.fragment(run_every=2)
+def write_queue_status():
+    """Show unsent changes in the sidebar and rerun the app once the server has answered some"""
+    queue = st.session_state.get('write_queue')
+    if queue is None:
+        return
+    if queue.has_completed():
+        st.rerun()
+    pending = len(queue.pending())
+    if pending:
+        st.caption(f"⏳ Syncing {pending} change(s) with TSheets...")
 
-def get_download_link(df, filename, text):
-    """Generate a download link for a dataframe"""
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">{text}</a>'
-    return href
+# --- Background Sync and Write-Behind Reconciliation ---
+if st.session_state.auth_token:
+    finish_sync()
+    reconcile_writes()
+    follow_dataset()
 
 # --- Sidebar: Authentication and Navigation ---
 with st.sidebar:
@@ -236,16 +166,20 @@ with st.sidebar:
        
         if login_button and token:
             st.session_state.auth_token = token
-            user_check = api_request("GET", f"{BASE_URL}/current_user")
+            user_check = api_request("GET", CURRENT_USER_ENDPOINT)
             if user_check:
+                current_user = next(iter(user_check.get('results', {}).get('users', {}).values()), {})
+                st.session_state.account_id = current_user.get('company_id')
                 st.success("✅ Authentication successful!")
-                load_data()
+                # Renders the locally stored data, if any, while the sync catches up
+                start_sync()
             else:
                 st.session_state.auth_token = None
                 st.error("❌ Invalid API token")
     else:
         if st.button("Confirm Logout", use_container_width=True):
             st.session_state.auth_token = None
+            st.session_state.account_id = None
             st.warning("Logged out successfully.")
    
     # Only show navigation when authenticated
@@ -260,6 +194,8 @@ with st.sidebar:
             "Edit Entry",
             "Reports"
         ]
+        if ADMIN_ENABLED:
+            view_options.append("Performance")
        
         selected_view = st.selectbox("Select View", view_options, index=view_options.index(st.session_state.view_mode))
        
@@ -280,10 +216,8 @@ with st.sidebar:
         )
        
         # User Filter
-        user_options = {"all": "All Users"}
-        if st.session_state.users:
-            for user_id, user_data in st.session_state.users.items():
-                user_options[user_id] = f"{user_data['first_name']} {user_data['last_name']}"
+        reference_options = get_reference_options()
+        user_options = {"all": "All Users", **reference_options.user_labels}
        
         st.selectbox(
             "Filter by User",
@@ -293,10 +227,7 @@ with st.sidebar:
         )
        
         # Job Code Filter
-        job_options = {"all": "All Job Codes"}
-        if st.session_state.jobcodes:
-            for job_id, job_data in st.session_state.jobcodes.items():
-                job_options[job_id] = job_data['name']
+        job_options = {"all": "All Job Codes", **reference_options.jobcode_labels}
        
         st.selectbox(
             "Filter by Job Code",
@@ -310,11 +241,12 @@ with st.sidebar:
             st.session_state.date_range = st.session_state.date_filter
             st.session_state.selected_user = st.session_state.user_filter
             st.session_state.selected_jobcode = st.session_state.job_filter
-            load_data()
+            start_sync()
             st.success("Filters applied successfully!")
        
         st.markdown("---")
-        st.button("🔄 Refresh Data", on_click=load_data, use_container_width=True)
+        st.button("🔄 Refresh Data", on_click=start_sync, use_container_width=True)
+        write_queue_status()
 
 # --- Main App Content ---
 if not st.session_state.auth_token:
@@ -351,737 +283,7 @@ if not st.session_state.auth_token:
    
     st.info("Need help? Contact your TSheets administrator for assistance.")
 
-elif st.session_state.loading:
-    st.markdown('<div class="main-header">Loading Data...</div>', unsafe_allow_html=True)
-    st.spinner()
-    progress_bar = st.progress(0)
-    for i in range(100):
-        progress_bar.progress(i + 1)
-        time.sleep(0.01)
-    st.experimental_rerun()
-
 else:
-    # --- Dashboard View ---
-    if st.session_state.view_mode == "Dashboard":
-        st.markdown('<div class="main-header">📊 TSheets Dashboard</div>', unsafe_allow_html=True)
-       
-        # Summary metrics
-        if st.session_state.timesheets:
-            # Calculate metrics
-            total_hours = sum(entry.get('duration', 0) for entry in st.session_state.timesheets) / 3600
-            unique_users = len(set(str(entry.get('user_id')) for entry in st.session_state.timesheets))
-            unique_jobs = len(set(str(entry.get('jobcode_id')) for entry in st.session_state.timesheets))
-            avg_daily_hours = total_hours / len(set(entry.get('date') for entry in st.session_state.timesheets)) if st.session_state.timesheets else 0
-           
-            # Display metrics
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-value">{total_hours:.1f}</div>
-                    <div class="metric-label">Total Hours</div>
-                </div>
-                """, unsafe_allow_html=True)
-           
-            with col2:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-value">{unique_users}</div>
-                    <div class="metric-label">Active Users</div>
-                </div>
-                """, unsafe_allow_html=True)
-           
-            with col3:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-value">{unique_jobs}</div>
-                    <div class="metric-label">Active Job Codes</div>
-                </div>
-                """, unsafe_allow_html=True)
-           
-            with col4:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-value">{avg_daily_hours:.1f}</div>
-                    <div class="metric-label">Avg. Daily Hours</div>
-                </div>
-                """, unsafe_allow_html=True)
-           
-            # Create dataframe for charts
-            df = pd.DataFrame(st.session_state.timesheets)
-            df['user_name'] = df['user_id'].apply(get_user_name)
-            df['jobcode_name'] = df['jobcode_id'].apply(get_jobcode_name)
-            df['hours'] = df['duration'].apply(lambda x: x / 3600)
-            df['date'] = pd.to_datetime(df['date'])
-           
-            # Charts
-            chart_col1, chart_col2 = st.columns(2)
-           
-            with chart_col1:
-                st.markdown('<div class="sub-header">Hours by User</div>', unsafe_allow_html=True)
-                user_hours = df.groupby('user_name')['hours'].sum().reset_index().sort_values('hours', ascending=False)
-               
-                fig = px.bar(
-                    user_hours,
-                    x='user_name',
-                    y='hours',
-                    color='hours',
-                    color_continuous_scale='Blues',
-                    labels={'user_name': 'User', 'hours': 'Hours'},
-                    height=400
-                )
-                fig.update_layout(xaxis_tickangle=-45)
-                st.plotly_chart(fig, use_container_width=True)
-           
-            with chart_col2:
-                st.markdown('<div class="sub-header">Hours by Job Code</div>', unsafe_allow_html=True)
-                job_hours = df.groupby('jobcode_name')['hours'].sum().reset_index().sort_values('hours', ascending=False)
-               
-                fig = px.pie(
-                    job_hours,
-                    values='hours',
-                    names='jobcode_name',
-                    hole=0.4,
-                    color_discrete_sequence=px.colors.sequential.Blues_r,
-                    height=400
-                )
-                fig.update_traces(textposition='inside', textinfo='percent+label')
-                st.plotly_chart(fig, use_container_width=True)
-           
-            # Time trend chart
-            st.markdown('<div class="sub-header">Daily Hours Trend</div>', unsafe_allow_html=True)
-            daily_hours = df.groupby(df['date'].dt.date)['hours'].sum().reset_index()
-            daily_hours.columns = ['date', 'hours']
-           
-            fig = px.line(
-                daily_hours,
-                x='date',
-                y='hours',
-                markers=True,
-                labels={'date': 'Date', 'hours': 'Hours'},
-                height=300
-            )
-            fig.update_layout(xaxis_title='Date', yaxis_title='Hours')
-            st.plotly_chart(fig, use_container_width=True)
-           
-        else:
-            st.info("No timesheet data available for the selected filters. Please adjust your filters or add new entries.")
-   
-    # --- View Timesheets ---
-    elif st.session_state.view_mode == "View Timesheets":
-        st.markdown('<div class="main-header">📋 Timesheet Overview</div>', unsafe_allow_html=True)
-       
-        if st.session_state.timesheets:
-            # Create a dataframe for display
-            data = []
-            for t in st.session_state.timesheets:
-                row = {
-                    "ID": t["id"],
-                    "User": get_user_name(t["user_id"]),
-                    "Job Code": get_jobcode_name(t["jobcode_id"]),
-                    "Date": t["date"],
-                    "Duration": format_duration(t.get("duration", 0)),
-                    "Type": t["type"].capitalize(),
-                    "Notes": t["notes"] if "notes" in t else ""
-                }
-                data.append(row)
-           
-            df = pd.DataFrame(data)
-           
-            # Add search and filter options
-            search_col1, search_col2 = st.columns([3, 1])
-            with search_col1:
-                search_term = st.text_input("Search timesheets", placeholder="Enter user name, job code, or notes...")
-           
-            with search_col2:
-                sort_by = st.selectbox("Sort by", ["Date", "User", "Job Code", "Duration"])
-           
-            if search_term:
-                df = df[
-                    df['User'].str.contains(search_term, case=False) |
-                    df['Job Code'].str.contains(search_term, case=False) |
-                    df['Notes'].str.contains(search_term, case=False)
-                ]
-           
-            if sort_by == "Date":
-                df = df.sort_values(by="Date", ascending=False)
-            elif sort_by == "User":
-                df = df.sort_values(by="User")
-            elif sort_by == "Job Code":
-                df = df.sort_values(by="Job Code")
-            elif sort_by == "Duration":
-                # Extract hours and minutes for sorting
-                df['Sort Duration'] = df['Duration'].apply(
-                    lambda x: int(x.split('h')[0]) * 60 + int(x.split('h')[1].strip().split('m')[0])
-                )
-                df = df.sort_values(by="Sort Duration", ascending=False)
-                df = df.drop(columns=['Sort Duration'])
-           
-            # Display the dataframe
-            st.dataframe(df, use_container_width=True)
-           
-            # Export options
-            export_col1, export_col2 = st.columns([3, 1])
-            with export_col1:
-                st.markdown(
-                    get_download_link(df, "timesheets_export.csv", "📥 Download as CSV"),
-                    unsafe_allow_html=True
-                )
-           
-            # Actions for selected timesheet
-            st.markdown('<div class="sub-header">Timesheet Actions</div>', unsafe_allow_html=True)
-            selected_id = st.selectbox("Select Timesheet ID for Actions", df['ID'].tolist())
-           
-            action_col1, action_col2, action_col3 = st.columns(3)
-            with action_col1:
-                if st.button("View Details", use_container_width=True):
-                    selected_entry = next((t for t in st.session_state.timesheets if t['id'] == selected_id), None)
-                    if selected_entry:
-                        st.json(selected_entry)
-           
-            with action_col2:
-                if st.button("Edit Entry", use_container_width=True):
-                    st.session_state.view_mode = "Edit Entry"
-                    st.experimental_rerun()
-           
-            with action_col3:
-                if st.button("Delete Entry", use_container_width=True):
-                    if st.session_state.auth_token:
-                        confirm = st.warning("Are you sure you want to delete this entry? This action cannot be undone.")
-                        confirm_col1, confirm_col2 = st.columns(2)
-                        with confirm_col1:
-                            if st.button("Yes, Delete", use_container_width=True):
-                                response = delete_timesheet(selected_id)
-                                if response:
-                                    st.success("✅ Entry deleted successfully.")
-                                    load_data()
-                                else:
-                                    st.error("❌ Failed to delete entry.")
-                        with confirm_col2:
-                            if st.button("Cancel", use_container_width=True):
-                                st.experimental_rerun()
-        else:
-            st.info("No timesheet data available for the selected filters.")
-   
-    # --- Add Entry ---
-    elif st.session_state.view_mode == "Add Entry":
-        st.markdown('<div class="main-header">➕ Add New Timesheet Entry</div>', unsafe_allow_html=True)
-       
-        with st.form("add_entry_form", clear_on_submit=True):
-            st.markdown('<div class="form-section">', unsafe_allow_html=True)
-           
-            # User and Job Code selection
-            col1, col2 = st.columns(2)
-            with col1:
-                user_options = {}
-                if st.session_state.users:
-                    for user_id, user_data in st.session_state.users.items():
-                        user_options[user_id] = f"{user_data['first_name']} {user_data['last_name']}"
-               
-                user_id = st.selectbox(
-                    "User",
-                    options=list(user_options.keys()),
-                    format_func=lambda x: user_options[x]
-                )
-           
-            with col2:
-                job_options = {}
-                if st.session_state.jobcodes:
-                    for job_id, job_data in st.session_state.jobcodes.items():
-                        job_options[job_id] = job_data['name']
-               
-                jobcode_id = st.selectbox(
-                    "Job Code",
-                    options=list(job_options.keys()),
-                    format_func=lambda x: job_options[x]
-                )
-           
-            # Date and Time
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                entry_date = st.date_input("Entry Date", value=date.today())
-           
-            with col2:
-                start_time = st.time_input("Start Time", value=datetime.now().time().replace(minute=0, second=0, microsecond=0))
-           
-            with col3:
-                # Default to 1 hour after start time
-                default_end = datetime.combine(date.today(), start_time) + timedelta(hours=1)
-                end_time = st.time_input("End Time", value=default_end.time())
-           
-            # Entry type and notes
-            col1, col2 = st.columns(2)
-            with col1:
-                entry_type = st.selectbox("Entry Type", ["regular", "manual"])
-           
-            with col2:
-                notes = st.text_area("Notes", placeholder="Enter any notes about this timesheet entry...")
-           
-            # Custom fields
-            st.markdown("### Custom Fields")
-            custom_col1, custom_col2 = st.columns(2)
-            with custom_col1:
-                custom1 = st.text_input("Custom Field 1", placeholder="Project code, reference number, etc.")
-           
-            with custom_col2:
-                custom2 = st.text_input("Custom Field 2", placeholder="Additional information")
-           
-            st.markdown('</div>', unsafe_allow_html=True)
-           
-            # Validation before submission
-            start_dt = datetime.combine(entry_date, start_time)
-            end_dt = datetime.combine(entry_date, end_time)
-           
-            if end_dt <= start_dt:
-                st.warning("End time must be after start time.")
-           
-            # Submit button
-            submit_col1, submit_col2 = st.columns([3, 1])
-            with submit_col2:
-                submit_button = st.form_submit_button("Submit Entry", use_container_width=True)
-           
-            if submit_button:
-                if end_dt <= start_dt:
-                    st.error("❌ End time must be after start time.")
-                else:
-                    new_entry = {
-                        "user_id": int(user_id),
-                        "jobcode_id": int(jobcode_id),
-                        "type": entry_type,
-                        "start": start_dt.isoformat(),
-                        "end": end_dt.isoformat(),
-                        "date": entry_date.isoformat(),
-                        "notes": notes,
-                        "customfields": {
-                            "19142": custom1,
-                            "19144": custom2
-                        }
-                    }
-                   
-                    response = create_timesheet(new_entry)
-                    if response:
-                        st.success("✅ Entry created successfully.")
-                        load_data()
-                    else:
-                        st.error("❌ Failed to create entry.")
-   
-    # --- Edit Entry ---
-    elif st.session_state.view_mode == "Edit Entry":
-        st.markdown('<div class="main-header">✏️ Edit Timesheet Entry</div>', unsafe_allow_html=True)
-       
-        if st.session_state.timesheets:
-            # Create a selection dataframe for better UX
-            selection_data = []
-            for t in st.session_state.timesheets:
-                row = {
-                    "ID": t["id"],
-                    "User": get_user_name(t["user_id"]),
-                    "Job Code": get_jobcode_name(t["jobcode_id"]),
-                    "Date": t["date"],
-                    "Duration": format_duration(t.get("duration", 0))
-                }
-                selection_data.append(row)
-           
-            selection_df = pd.DataFrame(selection_data)
-           
-            # Display selection dataframe
-            st.dataframe(selection_df, use_container_width=True)
-           
-            # Select entry to edit
-            selected_id = st.selectbox("Select Entry ID to Edit", selection_df['ID'].tolist())
-            selected = next(t for t in st.session_state.timesheets if t['id'] == selected_id)
-           
-            with st.form("edit_entry_form"):
-                st.markdown('<div class="form-section">', unsafe_allow_html=True)
-               
-                # User and Job Code selection
-                col1, col2 = st.columns(2)
-                with col1:
-                    user_options = {}
-                    if st.session_state.users:
-                        for user_id, user_data in st.session_state.users.items():
-                            user_options[user_id] = f"{user_data['first_name']} {user_data['last_name']}"
-                   
-                    new_user_id = st.selectbox(
-                        "User",
-                        options=list(user_options.keys()),
-                        format_func=lambda x: user_options[x],
-                        index=list(user_options.keys()).index(str(selected['user_id'])) if str(selected['user_id']) in user_options else 0
-                    )
-               
-                with col2:
-                    job_options = {}
-                    if st.session_state.jobcodes:
-                        for job_id, job_data in st.session_state.jobcodes.items():
-                            job_options[job_id] = job_data['name']
-                   
-                    new_jobcode_id = st.selectbox(
-                        "Job Code",
-                        options=list(job_options.keys()),
-                        format_func=lambda x: job_options[x],
-                        index=list(job_options.keys()).index(str(selected['jobcode_id'])) if str(selected['jobcode_id']) in job_options else 0
-                    )
-               
-                # Parse existing dates and times
-                try:
-                    start_dt = datetime.fromisoformat(selected['start'].replace('Z', '+00:00'))
-                    end_dt = datetime.fromisoformat(selected['end'].replace('Z', '+00:00'))
-                    entry_date = datetime.strptime(selected['date'], '%Y-%m-%d').date()
-                except (ValueError, KeyError):
-                    start_dt = datetime.now()
-                    end_dt = datetime.now() + timedelta(hours=1)
-                    entry_date = date.today()
-               
-                # Date and Time
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    new_date = st.date_input("Entry Date", value=entry_date)
-               
-                with col2:
-                    new_start_time = st.time_input("Start Time", value=start_dt.time())
-               
-                with col3:
-                    new_end_time = st.time_input("End Time", value=end_dt.time())
-               
-                # Entry type and notes
-                col1, col2 = st.columns(2)
-                with col1:
-                    new_type = st.selectbox(
-                        "Type",
-                        ["regular", "manual"],
-                        index=0 if selected['type'] == "regular" else 1
-                    )
-               
-                with col2:
-                    new_notes = st.text_area("Notes", value=selected.get('notes', ''))
-               
-                # Custom fields
-                st.markdown("### Custom Fields")
-                custom_fields = selected.get('customfields', {})
-                custom_col1, custom_col2 = st.columns(2)
-                with custom_col1:
-                    new_custom1 = st.text_input("Custom Field 1", value=custom_fields.get("19142", ""))
-               
-                with custom_col2:
-                    new_custom2 = st.text_input("Custom Field 2", value=custom_fields.get("19144", ""))
-               
-                st.markdown('</div>', unsafe_allow_html=True)
-               
-                # Validation before submission
-                new_start_dt = datetime.combine(new_date, new_start_time)
-                new_end_dt = datetime.combine(new_date, new_end_time)
-               
-                if new_end_dt <= new_start_dt:
-                    st.warning("End time must be after start time.")
-               
-                # Submit button
-                submit_col1, submit_col2, submit_col3 = st.columns([2, 2, 1])
-                with submit_col3:
-                    update_button = st.form_submit_button("Update Entry", use_container_width=True)
-               
-                if update_button:
-                    if new_end_dt <= new_start_dt:
-                        st.error("❌ End time must be after start time.")
-                    else:
-                        updated_entry = {
-                            "user_id": int(new_user_id),
-                            "jobcode_id": int(new_jobcode_id),
-                            "type": new_type,
-                            "start": new_start_dt.isoformat(),
-                            "end": new_end_dt.isoformat(),
-                            "date": new_date.isoformat(),
-                            "notes": new_notes,
-                            "customfields": {
-                                "19142": new_custom1,
-                                "19144": new_custom2
-                            }
-                        }
-                       
-                        response = update_timesheet(selected_id, updated_entry)
-                        if response:
-                            st.success("✅ Entry updated successfully.")
-                            load_data()
-                        else:
-                            st.error("❌ Failed to update entry.")
-        else:
-            st.info("No entries available to edit. Please adjust your filters or add new entries.")
-   
-    # --- Reports ---
-    elif st.session_state.view_mode == "Reports":
-        st.markdown('<div class="main-header">📊 Reports</div>', unsafe_allow_html=True)
-       
-        report_type = st.selectbox(
-            "Select Report Type",
-            ["Hours by User", "Hours by Job Code", "Daily Summary", "Weekly Summary", "Custom Report"]
-        )
-       
-        if st.session_state.timesheets:
-            # Create dataframe for reports
-            df = pd.DataFrame(st.session_state.timesheets)
-            df['user_name'] = df['user_id'].apply(get_user_name)
-            df['jobcode_name'] = df['jobcode_id'].apply(get_jobcode_name)
-            df['hours'] = df['duration'].apply(lambda x: x / 3600)
-            df['date'] = pd.to_datetime(df['date'])
-            df['week'] = df['date'].dt.isocalendar().week
-            df['month'] = df['date'].dt.month
-            df['year'] = df['date'].dt.year
-           
-            if report_type == "Hours by User":
-                st.markdown('<div class="sub-header">Hours by User Report</div>', unsafe_allow_html=True)
-               
-                # Group by user
-                user_hours = df.groupby('user_name')['hours'].agg(['sum', 'mean', 'count']).reset_index()
-                user_hours.columns = ['User', 'Total Hours', 'Average Hours', 'Entry Count']
-                user_hours = user_hours.sort_values('Total Hours', ascending=False)
-               
-                # Display table
-                st.dataframe(user_hours, use_container_width=True)
-               
-                # Chart
-                fig = px.bar(
-                    user_hours,
-                    x='User',
-                    y='Total Hours',
-                    color='Total Hours',
-                    text='Total Hours',
-                    color_continuous_scale='Blues',
-                    labels={'User': 'User', 'Total Hours': 'Total Hours'},
-                    height=400
-                )
-                fig.update_layout(xaxis_tickangle=-45)
-                fig.update_traces(texttemplate='%{text:.1f}', textposition='outside')
-                st.plotly_chart(fig, use_container_width=True)
-               
-                # Export
-                st.markdown(
-                    get_download_link(user_hours, "hours_by_user.csv", "📥 Download Report as CSV"),
-                    unsafe_allow_html=True
-                )
-           
-            elif report_type == "Hours by Job Code":
-                st.markdown('<div class="sub-header">Hours by Job Code Report</div>', unsafe_allow_html=True)
-               
-                # Group by job code
-                job_hours = df.groupby('jobcode_name')['hours'].agg(['sum', 'mean', 'count']).reset_index()
-                job_hours.columns = ['Job Code', 'Total Hours', 'Average Hours', 'Entry Count']
-                job_hours = job_hours.sort_values('Total Hours', ascending=False)
-               
-                # Display table
-                st.dataframe(job_hours, use_container_width=True)
-               
-                # Chart
-                fig = px.pie(
-                    job_hours,
-                    values='Total Hours',
-                    names='Job Code',
-                    hole=0.4,
-                    color_discrete_sequence=px.colors.sequential.Blues_r,
-                    height=400
-                )
-                fig.update_traces(textposition='inside', textinfo='percent+label')
-                st.plotly_chart(fig, use_container_width=True)
-               
-                # Export
-                st.markdown(
-                    get_download_link(job_hours, "hours_by_job_code.csv", "📥 Download Report as CSV"),
-                    unsafe_allow_html=True
-                )
-           
-            elif report_type == "Daily Summary":
-                st.markdown('<div class="sub-header">Daily Summary Report</div>', unsafe_allow_html=True)
-               
-                # Group by date
-                daily_hours = df.groupby(df['date'].dt.date).agg({
-                    'hours': ['sum', 'mean', 'count'],
-                    'user_id': 'nunique',
-                    'jobcode_id': 'nunique'
-                }).reset_index()
-               
-                daily_hours.columns = ['Date', 'Total Hours', 'Average Hours', 'Entry Count', 'Unique Users', 'Unique Jobs']
-                daily_hours = daily_hours.sort_values('Date', ascending=False)
-               
-                # Display table
-                st.dataframe(daily_hours, use_container_width=True)
-               
-                # Chart
-                fig = px.line(
-                    daily_hours,
-                    x='Date',
-                    y='Total Hours',
-                    markers=True,
-                    labels={'Date': 'Date', 'Total Hours': 'Total Hours'},
-                    height=400
-                )
-                fig.update_layout(xaxis_title='Date', yaxis_title='Hours')
-                st.plotly_chart(fig, use_container_width=True)
-               
-                # Export
-                st.markdown(
-                    get_download_link(daily_hours, "daily_summary.csv", "📥 Download Report as CSV"),
-                    unsafe_allow_html=True
-                )
-           
-            elif report_type == "Weekly Summary":
-                st.markdown('<div class="sub-header">Weekly Summary Report</div>', unsafe_allow_html=True)
-               
-                # Group by year and week
-                weekly_hours = df.groupby([df['year'], df['week']]).agg({
-                    'hours': ['sum', 'mean', 'count'],
-                    'user_id': 'nunique',
-                    'jobcode_id': 'nunique',
-                    'date': ['min', 'max']
-                }).reset_index()
-               
-                weekly_hours.columns = [
-                    'Year', 'Week', 'Total Hours', 'Average Hours', 'Entry Count',
-                    'Unique Users', 'Unique Jobs', 'Start Date', 'End Date'
-                ]
-                weekly_hours = weekly_hours.sort_values(['Year', 'Week'], ascending=[False, False])
-               
-                # Add week label
-                weekly_hours['Week Label'] = weekly_hours.apply(
-                    lambda x: f"Week {int(x['Week'])}: {x['Start Date'].strftime('%b %d')} - {x['End Date'].strftime('%b %d')}",
-                    axis=1
-                )
-               
-                # Display table
-                display_cols = [
-                    'Week Label', 'Total Hours', 'Average Hours', 'Entry Count',
-                    'Unique Users', 'Unique Jobs'
-                ]
-                st.dataframe(weekly_hours[display_cols], use_container_width=True)
-               
-                # Chart
-                fig = px.bar(
-                    weekly_hours.sort_values(['Year', 'Week']),
-                    x='Week Label',
-                    y='Total Hours',
-                    color='Unique Users',
-                    text='Total Hours',
-                    labels={'Week Label': 'Week', 'Total Hours': 'Total Hours'},
-                    height=400
-                )
-                fig.update_layout(xaxis_tickangle=-45)
-                fig.update_traces(texttemplate='%{text:.1f}', textposition='outside')
-                st.plotly_chart(fig, use_container_width=True)
-               
-                # Export
-                st.markdown(
-                    get_download_link(weekly_hours[display_cols], "weekly_summary.csv", "📥 Download Report as CSV"),
-                    unsafe_allow_html=True
-                )
-           
-            elif report_type == "Custom Report":
-                st.markdown('<div class="sub-header">Custom Report Builder</div>', unsafe_allow_html=True)
-               
-                # Report configuration
-                config_col1, config_col2 = st.columns(2)
-               
-                with config_col1:
-                    group_by = st.multiselect(
-                        "Group By",
-                        options=["User", "Job Code", "Date", "Week", "Month", "Year"],
-                        default=["User", "Job Code"]
-                    )
-               
-                with config_col2:
-                    metrics = st.multiselect(
-                        "Metrics",
-                        options=["Total Hours", "Average Hours", "Entry Count", "Unique Users", "Unique Jobs"],
-                        default=["Total Hours", "Entry Count"]
-                    )
-               
-                # Map selections to dataframe columns
-                group_map = {
-                    "User": "user_name",
-                    "Job Code": "jobcode_name",
-                    "Date": df['date'].dt.date,
-                    "Week": df['week'],
-                    "Month": df['month'],
-                    "Year": df['year']
-                }
-               
-                metric_map = {
-                    "Total Hours": ("hours", "sum"),
-                    "Average Hours": ("hours", "mean"),
-                    "Entry Count": ("hours", "count"),
-                    "Unique Users": ("user_id", "nunique"),
-                    "Unique Jobs": ("jobcode_id", "nunique")
-                }
-               
-                if group_by and metrics:
-                    # Create groupby columns
-                    groupby_cols = [group_map[g] for g in group_by]
-                   
-                    # Create aggregation dictionary
-                    agg_dict = {metric_map[m][0]: metric_map[m][1] for m in metrics}
-                   
-                    # Generate report
-                    custom_report = df.groupby(groupby_cols).agg(agg_dict).reset_index()
-                   
-                    # Rename columns
-                    column_map = {}
-                    for i, g in enumerate(group_by):
-                        column_map[i] = g
-                   
-                    for m in metrics:
-                        col_name = f"{metric_map[m][0]}_{metric_map[m][1]}"
-                        if col_name in custom_report.columns:
-                            column_map[col_name] = m
-                   
-                    custom_report = custom_report.rename(columns=column_map)
-                   
-                    # Display report
-                    st.dataframe(custom_report, use_container_width=True)
-                   
-                    # Export
-                    st.markdown(
-                        get_download_link(custom_report, "custom_report.csv", "📥 Download Custom Report as CSV"),
-                        unsafe_allow_html=True
-                    )
-                   
-                    # Visualization options
-                    if len(group_by) >= 1 and "Total Hours" in metrics:
-                        viz_type = st.selectbox(
-                            "Visualization Type",
-                            options=["Bar Chart", "Pie Chart", "Line Chart"],
-                            index=0
-                        )
-                       
-                        if viz_type == "Bar Chart":
-                            fig = px.bar(
-                                custom_report,
-                                x=group_by[0],
-                                y="Total Hours",
-                                color=group_by[1] if len(group_by) > 1 else None,
-                                barmode="group",
-                                height=400
-                            )
-                            st.plotly_chart(fig, use_container_width=True)
-                       
-                        elif viz_type == "Pie Chart":
-                            fig = px.pie(
-                                custom_report,
-                                values="Total Hours",
-                                names=group_by[0],
-                                height=400
-                            )
-                            st.plotly_chart(fig, use_container_width=True)
-                       
-                        elif viz_type == "Line Chart" and "Date" in group_by:
-                            date_col = group_by[group_by.index("Date")]
-                            fig = px.line(
-                                custom_report.sort_values(date_col),
-                                x=date_col,
-                                y="Total Hours",
-                                color=group_by[1] if len(group_by) > 1 and group_by[1] != "Date" else None,
-                                markers=True,
-                                height=400
-                            )
-                            st.plotly_chart(fig, use_container_width=True)
-               
-                else:
-                    st.warning("Please select at least one grouping field and one metric.")
-        else:
-            st.info("No timesheet data available for reporting. Please adjust your filters or add new entries.")
-
+    if st.session_state.get('sync_job') is not None:
+        sync_status()
+    importlib.import_module(VIEW_MODULES[st.session_state.view_mode]).render()
@@ -0,0 +1,337 @@
+"""Session data helpers shared by the app shell and its views.
+
+Everything here works on ``st.session_state``: the background sync, the
+timesheets on screen with their id and search indexes, and the
+write-behind queue. A session attaches read-only to the shared snapshot
+of its account and filter scope in ``dataset_registry`` and keeps only
+its own unconfirmed writes, laid over that snapshot. It imports only the
+API client, the store and the pure-Python indexes, so the login page and
+the sidebar can use it without loading pandas; the frame, report and
+chart helpers live in ``view_common``.
+"""
+import streamlit as st
+
+from tsheets_api import TSheetsAPIError, account_key
+from tsheets_async import bulk_mutate_timesheets, request as async_request
+from timesheet_sync import sync_scope, split_changes
+from timesheet_store import get_store
+from timesheet_index import ReferenceOptions
+from dataset_registry import DatasetSnapshot, dataset_registry
+from sync_worker import SyncJob
+from write_queue import WriteBehindQueue, optimistic_entry
+
+# Date ranges longer than this are fetched as concurrent per-week windows
+TIMESHEET_WINDOW_DAYS = 7
+
+
+def api_request(method, url, params=None, data=None):
+    """Make an API request to TSheets with proper error handling"""
+    try:
+        with st.spinner("Processing request..."):
+            return async_request(st.session_state.auth_token, method, url, params=params, data=data)
+    except TSheetsAPIError as e:
+        show_api_error(e)
+        return None
+
+
+def show_api_error(error):
+    """Display a TSheetsAPIError to the user"""
+    if error.status_code == 401:
+        st.error("Authentication failed. Please check your API token.")
+    else:
+        st.error(f"API Error: {error.message}")
+
+
+def current_scope():
+    """Return the sync scope of the active sidebar filters"""
+    return sync_scope(
+        st.session_state.date_range,
+        st.session_state.selected_user,
+        st.session_state.selected_jobcode
+    )
+
+
+def load_cached_data(account, scope):
+    """Read a scope from the local store as ``(timesheets, users, jobcodes, synced_at)``, or None if it was never synced"""
+    store = get_store()
+    synced_at = store.get_synced_at(account, scope)
+    users = store.load_reference(account, 'users')
+    jobcodes = store.load_reference(account, 'jobcodes')
+    if synced_at is None or users is None or jobcodes is None:
+        return None
+    return store.load(account, scope), users, jobcodes, synced_at
+
+
+def pending_changes():
+    """Return ``(changed, deleted_ids)`` for this session's writes the server has not confirmed yet"""
+    changed, deleted_ids = {}, set()
+    queue = st.session_state.get('write_queue')
+    if queue is None:
+        return changed, deleted_ids
+    for write in queue.unreconciled():
+        if write.error is not None:
+            continue
+        entry_id = queue.resolve_id(write.local_id)
+        if write.method == "DELETE":
+            changed.pop(entry_id, None)
+            deleted_ids.add(entry_id)
+        else:
+            deleted_ids.discard(entry_id)
+            changed[entry_id] = {**write.local, "id": int(entry_id)}
+    return changed, deleted_ids
+
+
+def refresh_view():
+    """Show the latest snapshot of the session's dataset with its unconfirmed writes laid over it.
+
+    Without such writes the session shows the shared snapshot itself, so its
+    frame and indexes are shared too; otherwise it gets a private snapshot
+    for as long as the writes are in flight, whose table shares the
+    snapshot's dictionaries and whose artifacts are patched from the
+    snapshot's.
+    """
+    dataset = st.session_state.get('dataset')
+    snapshot = dataset.snapshot if dataset is not None else None
+    if snapshot is None:
+        return
+    st.session_state.snapshot = snapshot
+    st.session_state.users = snapshot.users
+    st.session_state.jobcodes = snapshot.jobcodes
+    changed, deleted_ids = pending_changes()
+    if snapshot.touched_by(*split_changes(changed, deleted_ids, snapshot.scope)):
+        view = snapshot.overlaid(changed, deleted_ids)
+    else:
+        view = snapshot
+    st.session_state.view = view
+    st.session_state.timesheets = view.timesheets
+
+
+def follow_dataset():
+    """Move the session to its dataset's latest snapshot if another session or a sync published one"""
+    dataset = st.session_state.get('dataset')
+    if dataset is not None and dataset.snapshot is not st.session_state.get('snapshot'):
+        refresh_view()
+
+
+def clear_view():
+    """Show no timesheets, as after a failed full load"""
+    st.session_state.snapshot = None
+    st.session_state.view = None
+    st.session_state.timesheets = []
+
+
+def commit_changes(changed, deleted_ids):
+    """Save confirmed changes to the local store and publish them to every session on the account"""
+    if not changed and not deleted_ids:
+        return
+    account = account_key(st.session_state.auth_token, st.session_state.account_id)
+    get_store().apply_changes(account, changed.values(), deleted_ids)
+    dataset_registry.apply_changes(account, changed, deleted_ids)
+
+
+def start_sync():
+    """Start syncing the current filter scope on a background thread, replacing any sync in progress"""
+    account = account_key(st.session_state.auth_token, st.session_state.account_id)
+    scope = current_scope()
+    dataset = dataset_registry.attach(account, scope)
+   
+    # Show the scope right away if another session or the local store has it
+    if st.session_state.get('dataset') is not dataset:
+        st.session_state.dataset = dataset
+        dataset_registry.load(dataset, lambda: load_cached_data(account, scope))
+        refresh_view()
+   
+    params = {"supplemental_data": "yes"}
+    if st.session_state.selected_user != "all":
+        params["user_ids"] = st.session_state.selected_user
+    if st.session_state.selected_jobcode != "all":
+        params["jobcode_ids"] = st.session_state.selected_jobcode
+    start_date, end_date = st.session_state.date_range
+    window_days = TIMESHEET_WINDOW_DAYS if (end_date - start_date).days >= TIMESHEET_WINDOW_DAYS else None
+   
+    # A delta since the last sync when the scope is already loaded
+    base = dataset.snapshot
+    st.session_state.sync_job = SyncJob(
+        st.session_state.auth_token,
+        st.session_state.account_id,
+        dataset,
+        st.session_state.date_range,
+        params,
+        window_days=window_days,
+        base=base,
+        users=base.users if base is not None else st.session_state.users,
+        jobcodes=base.jobcodes if base is not None else st.session_state.jobcodes
+    ).start()
+
+
+def finish_sync():
+    """Show the result of a finished background sync in the session"""
+    job = st.session_state.get('sync_job')
+    if job is None or not job.done:
+        return
+    st.session_state.sync_job = None
+    result = job.result
+   
+    if result.reference_error is not None:
+        show_api_error(result.reference_error)
+    if result.error is not None:
+        show_api_error(result.error)
+        # A failed delta keeps the data already on screen
+        if job.dataset.snapshot is None and st.session_state.get('dataset') is job.dataset:
+            clear_view()
+        return
+    refresh_view()
+
+
+def current_view():
+    """Return the snapshot on screen: the dataset's, or a private one with this session's writes laid over it"""
+    view = st.session_state.get('view')
+    if view is None:
+        # Nothing is loaded yet, or the last full load failed
+        view = st.session_state.view = DatasetSnapshot(
+            None, st.session_state.timesheets, st.session_state.users, st.session_state.jobcodes, None
+        )
+    return view
+
+
+def artifact(name, build, patch=None):
+    """Return the artifact ``name`` of the snapshot on screen; see ``DatasetSnapshot.artifact``.
+
+    While the session shows its dataset snapshot unchanged the artifact is
+    shared with every session showing it; otherwise it is kept on this
+    session's private snapshot, patched from the shared one when ``patch``
+    is given.
+    """
+    return current_view().artifact(name, build, patch)
+
+
+def get_search_index():
+    """Return the search index of the timesheets on screen"""
+    return current_view().search_index()
+
+
+def get_id_index():
+    """Return the id -> timesheet index of the timesheets on screen"""
+    # A table looks entries up by id itself
+    return current_view().timesheets
+
+
+def get_reference_options():
+    """Return the user and job code selectbox options for the loaded users and job codes"""
+    options = st.session_state.get('reference_options')
+    if options is None or not options.is_for(st.session_state.users, st.session_state.jobcodes):
+        options = ReferenceOptions(st.session_state.users, st.session_state.jobcodes)
+        st.session_state.reference_options = options
+    return options
+
+
+def mutate_timesheets(method, items, progress=None, show_errors=True):
+    """Send a bulk create, update or delete and apply the entries that succeeded locally.
+
+    Returns ``(succeeded, failed)`` as ``bulk_mutate_timesheets`` does.
+    """
+    with st.spinner("Processing request..."):
+        succeeded, failed = bulk_mutate_timesheets(
+            st.session_state.auth_token, method, items, progress=progress
+        )
+    if method == "DELETE":
+        commit_changes({}, {str(record['id']) for _, record in succeeded})
+    else:
+        commit_changes({str(record['id']): record for _, record in succeeded}, set())
+    refresh_view()
+    if show_errors:
+        for _, error in failed:
+            show_api_error(error)
+    return succeeded, failed
+
+
+def get_write_queue():
+    """Return this session's write-behind queue, creating it for the current token"""
+    queue = st.session_state.get('write_queue')
+    if queue is None or queue.token != st.session_state.auth_token:
+        queue = WriteBehindQueue(st.session_state.auth_token)
+        st.session_state.write_queue = queue
+    return queue
+
+
+def find_timesheet(entry_id):
+    """Return the loaded timesheet with the given id, or None"""
+    return get_id_index().get(entry_id)
+
+
+def create_timesheet(entry):
+    """Create a new timesheet entry locally and queue it for TSheets"""
+    queue = get_write_queue()
+    local_id = queue.new_local_id()
+    local = optimistic_entry(local_id, entry)
+    queue.submit("POST", entry, local_id, local=local)
+    refresh_view()
+    return local
+
+
+def update_timesheet(entry_id, updates):
+    """Update an existing timesheet entry locally and queue the change for TSheets"""
+    local = optimistic_entry(entry_id, updates, find_timesheet(entry_id))
+    get_write_queue().submit("PUT", {"id": entry_id, **updates}, entry_id, local=local)
+    refresh_view()
+    return local
+
+
+def delete_timesheet(entry_id):
+    """Delete a timesheet entry locally and queue the deletion for TSheets"""
+    previous = find_timesheet(entry_id)
+    get_write_queue().submit("DELETE", {"id": entry_id}, entry_id)
+    refresh_view()
+    return previous or {"id": entry_id}
+
+
+def reconcile_writes():
+    """Confirm answered writes with the server's records and roll back the rejected ones.
+
+    Confirmed records are published to every session on the account; the
+    rejected writes simply drop out of this session's overlay.
+    """
+    queue = st.session_state.get('write_queue')
+    if queue is None:
+        return
+    completed = queue.drain()
+    if not completed:
+        return
+    changed, deleted_ids = {}, set()
+    for write in completed:
+        if write.error is None:
+            entry_id = str(write.record['id'])
+            if write.method == "DELETE":
+                changed.pop(entry_id, None)
+                deleted_ids.add(entry_id)
+            else:
+                deleted_ids.discard(entry_id)
+                changed[entry_id] = write.record
+            continue
+        show_api_error(write.error)
+        st.error(f"❌ TSheets rejected a change to entry {write.local_id}; it has been rolled back.")
+    commit_changes(changed, deleted_ids)
+    refresh_view()
+
+
+def get_user_name(user_id):
+    """Get user name from user ID"""
+    user_id = str(user_id)
+    if user_id in st.session_state.users:
+        return f"{st.session_state.users[user_id]['first_name']} {st.session_state.users[user_id]['last_name']}"
+    return f"User {user_id}"
+
+
+def get_jobcode_name(jobcode_id):
+    """Get job code name from job code ID"""
+    jobcode_id = str(jobcode_id)
+    if jobcode_id in st.session_state.jobcodes:
+        return st.session_state.jobcodes[jobcode_id]['name']
+    return f"Job {jobcode_id}"
+
+
+def format_duration(seconds):
+    """Format duration in seconds to hours and minutes"""
+    hours, remainder = divmod(seconds, 3600)
+    minutes, _ = divmod(remainder, 60)
+    return f"{int(hours)}h {int(minutes)}m"
@@ -0,0 +1,126 @@
+"""Measure time-to-first-render of the login page and of each view.
+
+Every target runs in a fresh interpreter, so each measurement includes
+importing Streamlit and whatever modules the page pulls in, as a new
+server process would. Pages are rendered with Streamlit's ``AppTest``
+harness; views are given a signed-in session holding ``--entries``
+synthetic timesheets, so no request reaches TSheets.
+
+    python benchmarks/bench_cold_start.py [--entries 20000] [--repeat 3] [--targets login Dashboard ...]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+APP = os.path.join(ROOT, "app.py")
+
+VIEWS = ["Dashboard", "View Timesheets", "Add Entry", "Edit Entry", "Reports", "Performance"]
+HEAVY_MODULES = ["pandas", "plotly.express", "pyarrow", "openpyxl"]
+
+
+def synthetic_session(entries, seed=7):
+    """Return users, job codes and timesheets shaped like the TSheets responses"""
+    rng = random.Random(seed)
+    users = {
+        str(user_id): {"id": user_id, "first_name": f"First{user_id}", "last_name": f"Last{user_id}"}
+        for user_id in range(1, 51)
+    }
+    jobcodes = {str(job_id): {"id": job_id, "name": f"Job {job_id}"} for job_id in range(1, 31)}
+    today = date.today()
+    timesheets = []
+    for entry_id in range(1, entries + 1):
+        day = today - timedelta(days=rng.randrange(30))
+        duration = rng.randrange(1800, 36000, 900)
+        timesheets.append({
+            "id": entry_id,
+            "user_id": rng.randrange(1, 51),
+            "jobcode_id": rng.randrange(1, 31),
+            "date": day.isoformat(),
+            "start": f"{day.isoformat()}T08:00:00+00:00",
+            "end": f"{day.isoformat()}T08:00:00+00:00",
+            "duration": duration,
+            "type": "regular",
+            "notes": f"entry {entry_id}"
+        })
+    return users, jobcodes, timesheets
+
+
+def render_once(target, entries):
+    """Render one page in this interpreter and return its timings as a dict"""
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest
+    imported = time.perf_counter()
+
+    os.environ["TSHEETS_ADMIN"] = "1"
+    app = AppTest.from_file(APP, default_timeout=120)
+    if target != "login":
+        users, jobcodes, timesheets = synthetic_session(entries)
+        app.session_state["auth_token"] = "benchmark"
+        app.session_state["users"] = users
+        app.session_state["jobcodes"] = jobcodes
+        app.session_state["timesheets"] = timesheets
+        app.session_state["view_mode"] = target
+    prepared = time.perf_counter()
+
+    app.run()
+    first = time.perf_counter()
+    app.run()
+    second = time.perf_counter()
+
+    return {
+        "target": target,
+        "import_streamlit_ms": (imported - start) * 1000,
+        "first_render_ms": (first - prepared) * 1000,
+        "rerun_ms": (second - first) * 1000,
+        "time_to_first_render_ms": (imported - start + first - prepared) * 1000,
+        "errors": [str(error.value) for error in app.exception],
+        "loaded": [module for module in HEAVY_MODULES if module in sys.modules]
+    }
+
+
+def measure(target, entries):
+    """Render ``target`` in a fresh interpreter and return its timings"""
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", target, "--entries", str(entries)],
+        capture_output=True, text=True, check=True, cwd=ROOT
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--targets", nargs="+", default=["login", *VIEWS])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(render_once(args.child, args.entries)))
+        return
+
+    print(f"{args.entries} synthetic entries, median of {args.repeat} cold starts per page")
+    print(f"{'page':<16} {'first render':>13} {'of which import':>16} {'rerun':>9}   heavy modules loaded")
+    for target in args.targets:
+        runs = [measure(target, args.entries) for _ in range(args.repeat)]
+        errors = runs[-1]["errors"]
+        print(
+            f"{target:<16} "
+            f"{statistics.median(run['time_to_first_render_ms'] for run in runs):10.0f} ms "
+            f"{statistics.median(run['import_streamlit_ms'] for run in runs):13.0f} ms "
+            f"{statistics.median(run['rerun_ms'] for run in runs):6.0f} ms   "
+            f"{', '.join(runs[-1]['loaded']) or '-'}"
+            + (f"   ERROR: {errors[0]}" if errors else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
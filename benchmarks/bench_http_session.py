@@ -0,0 +1,111 @@
+"""Compare per-call ``httpx.request`` against the pooled TSheets client.
+
+Starts a local keep-alive stub server that answers like a TSheets list
+endpoint, then times the same sequence of GETs both ways. Loopback has no
+real TCP/TLS handshake, so the stub charges ``--handshake-ms`` once per new
+connection to stand in for the round trips paid against rest.tsheets.com.
+
+    python benchmarks/bench_http_session.py [--requests 200] [--payload-kb 32] [--handshake-ms 30]
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from tsheets_async import get_http_client, run  # noqa: E402
+
+
+def make_handler(body, handshake_ms):
+    """Build a request handler that returns ``body`` gzipped when asked to"""
+    compressed = gzip.compress(body)
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            # One handler instance per connection: simulate the handshake here
+            time.sleep(handshake_ms / 1000)
+            super().setup()
+
+        def do_GET(self):
+            use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+            payload = compressed if use_gzip else body
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if use_gzip:
+                self.send_header("Content-Encoding", "gzip")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def time_calls(call, url, count):
+    """Return per-call latencies in milliseconds"""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = call(url)
+        response.raise_for_status()
+        response.json()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label, latencies):
+    print(
+        f"{label:<24} mean {statistics.mean(latencies):7.3f} ms   "
+        f"p50 {statistics.median(latencies):7.3f} ms   "
+        f"total {sum(latencies):8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--payload-kb", type=int, default=32)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    args = parser.parse_args()
+
+    records = {
+        str(i): {"id": i, "user_id": i % 50, "jobcode_id": i % 7, "duration": 3600, "notes": "x" * 40}
+        for i in range(args.payload_kb * 10)
+    }
+    body = json.dumps({"results": {"timesheets": records}, "more": False}).encode()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(body, args.handshake_ms))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/timesheets"
+    headers = {"Authorization": "Bearer stub"}
+
+    try:
+        per_call = time_calls(lambda u: httpx.request("GET", u, headers=headers), url, args.requests)
+        pooled = time_calls(lambda u: run(get_http_client().request("GET", u, headers=headers)), url, args.requests)
+    finally:
+        server.shutdown()
+
+    print(
+        f"{args.requests} GETs, {len(body) / 1024:.0f} KB JSON body, "
+        f"{args.handshake_ms:g} ms simulated handshake"
+    )
+    report("per-call connection", per_call)
+    report("pooled client", pooled)
+    print(f"speedup: {statistics.mean(per_call) / statistics.mean(pooled):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
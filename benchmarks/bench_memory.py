@@ -0,0 +1,141 @@
+"""Compare the memory of timesheets held as a list of dicts and as a ``TimesheetTable``.
+
+Each measurement runs in a fresh interpreter and traces the allocations of
+one representation of ``--sizes`` synthetic entries carrying every field
+TSheets returns for a timesheet. Retained memory counts the dicts and
+their values, or the arrays and dictionaries of the table; peak memory
+includes what loading needed. Converting the list to a table and building
+the views' frame and search index from each representation are timed
+afterwards, without tracing.
+
+    python benchmarks/bench_memory.py [--sizes 100000 1000000]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+REPRESENTATIONS = ["dicts", "table"]
+NOTES = [f"{verb} {thing} at site {site}" for verb in ("Fix", "Inspect", "Install", "Replace", "Service")
+         for thing in ("pump", "valve", "boiler", "filter", "meter") for site in range(40)]
+
+
+def synthetic_timesheets(entries, seed=7):
+    """Yield timesheets with every field of a TSheets ``/timesheets`` record"""
+    rng = random.Random(seed)
+    today = date.today()
+    for entry_id in range(1, entries + 1):
+        day = today - timedelta(days=rng.randrange(365))
+        start_minute = rng.randrange(6 * 60, 10 * 60)
+        duration = rng.randrange(1800, 36000, 60)
+        end_minute = start_minute + duration // 60
+        yield {
+            "id": entry_id,
+            "user_id": rng.randrange(1, 201),
+            "jobcode_id": rng.randrange(1, 101),
+            "start": f"{day.isoformat()}T{start_minute // 60:02d}:{start_minute % 60:02d}:00-06:00",
+            "end": f"{day.isoformat()}T{end_minute // 60 % 24:02d}:{end_minute % 60:02d}:00-06:00",
+            "duration": duration,
+            "date": day.isoformat(),
+            "tz": -6,
+            "tz_str": "tsMT",
+            "type": "regular",
+            "location": "(Android) Mobile App",
+            "on_the_clock": False,
+            "locked": 0,
+            # Most notes repeat a handful of phrases; one in ten is free text
+            "notes": rng.choice(NOTES) if rng.random() < 0.9 else f"Call-out {entry_id}: {rng.random():.6f}",
+            "customfields": {"19142": rng.choice(["", "Overtime", "Travel"]), "19144": ""},
+            "last_modified": f"{day.isoformat()}T{end_minute // 60 % 24:02d}:30:00+00:00",
+            "attached_files": [],
+            "created_by_user_id": rng.randrange(1, 201)
+        }
+
+
+def measure_once(representation, entries):
+    """Load ``entries`` timesheets as ``representation`` in this interpreter and return its figures"""
+    sys.path.insert(0, ROOT)
+    from timesheet_frame import build_timesheet_frame
+    from timesheet_table import TimesheetTable
+    from search_index import TimesheetSearchIndex
+
+    users = {str(user_id): {"first_name": f"First{user_id}", "last_name": f"Last{user_id}"} for user_id in range(1, 201)}
+    jobcodes = {str(job_id): {"name": f"Job {job_id}"} for job_id in range(1, 101)}
+
+    gc.collect()
+    tracemalloc.start()
+    if representation == "dicts":
+        timesheets = list(synthetic_timesheets(entries))
+    else:
+        timesheets = TimesheetTable.from_records(synthetic_timesheets(entries))
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    convert_seconds = 0.0
+    if representation == "table":
+        records = list(synthetic_timesheets(entries))
+        start = time.perf_counter()
+        TimesheetTable.from_records(records)
+        convert_seconds = time.perf_counter() - start
+        del records
+
+    start = time.perf_counter()
+    build_timesheet_frame(timesheets, users, jobcodes)
+    frame_built = time.perf_counter()
+    TimesheetSearchIndex.build(timesheets, users, jobcodes)
+    index_built = time.perf_counter()
+    return {
+        "representation": representation,
+        "entries": entries,
+        "retained_bytes": retained,
+        "peak_bytes": peak,
+        "convert_seconds": convert_seconds,
+        "frame_seconds": frame_built - start,
+        "index_seconds": index_built - frame_built
+    }
+
+
+def measure(representation, entries):
+    """Measure ``representation`` in a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", representation, "--sizes", str(entries)],
+        capture_output=True, text=True, check=True, cwd=ROOT
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_once(args.child, args.sizes[0])))
+        return
+
+    print(f"{'entries':>9} {'representation':<15} {'retained':>11} {'per entry':>10} {'peak':>11} "
+          f"{'convert':>8} {'frame build':>12} {'index build':>12}")
+    for entries in args.sizes:
+        results = [measure(representation, entries) for representation in REPRESENTATIONS]
+        for result in results:
+            print(
+                f"{entries:>9} {result['representation']:<15} "
+                f"{result['retained_bytes'] / 2**20:8.1f} MB {result['retained_bytes'] / entries:7.0f} B "
+                f"{result['peak_bytes'] / 2**20:8.1f} MB {result['convert_seconds']:7.2f}s "
+                f"{result['frame_seconds']:11.2f}s {result['index_seconds']:11.2f}s"
+            )
+        print(f"{'':>9} table keeps {results[1]['retained_bytes'] / results[0]['retained_bytes']:.1%} of the list's memory")
+
+
+if __name__ == "__main__":
+    main()
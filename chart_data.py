@@ -0,0 +1,103 @@
+"""Bounded chart inputs for the Dashboard and Reports charts.
+
+Plotly figures carry every point and category to the browser, so a chart
+over hundreds of users, job codes or days grows with the data. These
+helpers shrink a chart's table before the figure is built: categorical
+charts keep their largest categories and fold the rest into an "Other"
+bucket, time series are downsampled with Largest-Triangle-Three-Buckets
+(LTTB), which keeps the visible shape of a line, and long line traces are
+drawn with WebGL. Each table passed in is left untouched.
+"""
+import numpy as np
+import pandas as pd
+
+OTHER_LABEL = "Other"
+
+# Bars or pie slices per categorical chart, "Other" included
+MAX_CATEGORIES = 25
+# Colored series per chart, "Other" included
+MAX_SERIES = 10
+# Points per line series after downsampling
+MAX_POINTS = 500
+# Line charts with more points than this are drawn with WebGL (scattergl)
+WEBGL_POINTS = 1000
+
+
+def top_n(df, category, value, n=MAX_CATEGORIES, by=(), other=OTHER_LABEL):
+    """Keep the ``n - 1`` categories with the largest total ``value`` and fold the rest into ``other``.
+
+    Rows are re-aggregated by ``category`` and the ``by`` columns, so only
+    those columns and ``value`` are kept; categories come out largest first
+    with ``other`` last. Tables with at most ``n`` categories are returned as is.
+    """
+    by = list(by)
+    totals = df.groupby(category, observed=True, sort=False)[value].sum()
+    if len(totals) <= n:
+        return df
+    keep = totals.nlargest(n - 1).index
+    labels = df[category].astype(object).where(df[category].isin(keep), other)
+    folded = (
+        df.assign(**{category: labels})
+        .groupby([category, *by], observed=True, sort=False, dropna=False)[value].sum()
+        .reset_index()
+    )
+    rank = {label: position for position, label in enumerate([*keep, other])}
+    return folded.sort_values(category, key=lambda labels: labels.map(rank), kind='stable', ignore_index=True)
+
+
+def _numeric(values):
+    """Float positions of numeric, datetime or ``date`` values for the LTTB area computation"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    return pd.to_datetime(values).to_numpy(dtype='datetime64[ns]').astype('int64').astype(float)
+
+
+def lttb_indices(x, y, threshold):
+    """Positions of the ``threshold`` points LTTB keeps from the series ``(x, y)``, sorted by ``x``"""
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+    # The first and last points are always kept; the rest is split into threshold - 2 buckets
+    edges = np.linspace(1, size - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x = x[end:edges[bucket + 2]].mean()
+            next_y = y[end:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[size - 1], y[size - 1]
+        # The point forming the largest triangle with the previous pick and the next bucket's mean
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+    selected[-1] = size - 1
+    return selected
+
+
+def downsample(df, x, y, max_points=MAX_POINTS, by=None):
+    """Rows of ``df`` sorted by ``x`` with each ``by`` series LTTB-downsampled to ``max_points``"""
+    df = df.sort_values(x, kind='stable', ignore_index=True)
+    if len(df) <= max_points:
+        return df
+    x_values = _numeric(df[x])
+    y_values = df[y].to_numpy(dtype=float)
+    if by is None:
+        series = [np.arange(len(df))]
+    else:
+        series = df.groupby(by, observed=True, sort=False, dropna=False).indices.values()
+    keep = [
+        positions[lttb_indices(x_values[positions], y_values[positions], max_points)]
+        for positions in series
+    ]
+    return df.iloc[np.sort(np.concatenate(keep))].reset_index(drop=True)
+
+
+def line_render_mode(df):
+    """``render_mode`` for ``px.line``: WebGL once the traces carry more than ``WEBGL_POINTS`` points"""
+    return "webgl" if len(df) > WEBGL_POINTS else "svg"
@@ -0,0 +1,245 @@
+"""Process-wide timesheet snapshots shared read-only by every browser session.
+
+Sessions used to hold their own copy of the timesheets they showed, so
+thirty tabs on one account meant thirty copies of the same month. The
+registry keeps one ``Dataset`` per account and filter scope instead;
+every session showing that scope attaches to its latest
+``DatasetSnapshot``, together with the frame, indexes and sort orders
+derived from it, which are built once for all of them. A session's own
+unsaved edits are laid over the snapshot as a private snapshot by the
+app, and only while they last.
+
+Snapshots never change once published: a sync or a confirmed write
+publishes new snapshots for every scope of the account it touches, and
+sessions move to them on their next rerun. A snapshot merged from
+another one, or laid over it, patches the other's artifacts for the
+changed entries instead of deriving them from every entry again. The
+registry only holds weak references to datasets, so a scope's timesheets
+are freed as soon as no session or sync job uses them.
+"""
+import threading
+import weakref
+
+from timesheet_sync import split_changes
+from timesheet_table import TimesheetTable
+from search_index import (
+    OVERLAY_COMPACT_FRACTION,
+    OVERLAY_COMPACT_MIN,
+    OverlaySearchIndex,
+    TimesheetSearchIndex
+)
+from instrumentation import telemetry
+
+
+def build_search_index(snapshot):
+    """Index every entry of a snapshot for search"""
+    with telemetry.timer("index_build", index="search"):
+        return TimesheetSearchIndex.build(snapshot.timesheets, snapshot.users, snapshot.jobcodes)
+
+
+def patch_search_index(snapshot, index, upserted, removed_ids):
+    """Lay a delta over a search index while the overlay stays small, else None"""
+    size = (index.size if isinstance(index, OverlaySearchIndex) else 0) + len(upserted) + len(removed_ids)
+    if size > max(OVERLAY_COMPACT_MIN, OVERLAY_COMPACT_FRACTION * len(snapshot.timesheets)):
+        return None
+    with telemetry.timer("index_build", index="search_overlay"):
+        if isinstance(index, OverlaySearchIndex):
+            return index.merge(upserted, removed_ids, snapshot.users, snapshot.jobcodes)
+        return OverlaySearchIndex(index, upserted, removed_ids, snapshot.users, snapshot.jobcodes)
+
+
+class DatasetSnapshot:
+    """Read-only timesheets of one account scope, with artifacts derived from them on demand.
+
+    The timesheets are kept as a compact ``TimesheetTable``, which also looks
+    entries up by id. ``timesheets``, ``users`` and ``jobcodes`` are shared
+    between sessions and must not be mutated. Only ``synced_at`` moves, when
+    a sync finds nothing new. ``derived_from`` is ``(base, upserted,
+    removed_ids)`` for a snapshot made by laying a delta over ``base``:
+    either the snapshot itself or the artifacts it had built.
+    """
+
+    def __init__(self, scope, timesheets, users, jobcodes, synced_at, derived_from=None):
+        self.scope = scope
+        if not isinstance(timesheets, TimesheetTable):
+            with telemetry.timer("table_build"):
+                timesheets = TimesheetTable.from_records(timesheets)
+        self.timesheets = timesheets
+        self.users = users
+        self.jobcodes = jobcodes
+        self.synced_at = synced_at
+        self._derived_from = derived_from
+        self._artifacts = {}
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def artifact(self, name, build, patch=None):
+        """Return the artifact ``name``, computing it the first time any session asks for it.
+
+        ``build(snapshot)`` derives it from this snapshot. For a snapshot
+        made by laying a delta over another one, ``patch(snapshot, base,
+        upserted, removed_ids)`` is tried first with the other's artifact
+        of that name as ``base``; it returns None to fall back to
+        ``build``. Sessions asking for an artifact while it is being built
+        wait for that build instead of starting their own.
+        """
+        with self._lock:
+            if name in self._artifacts:
+                return self._artifacts[name]
+            building = self._building.setdefault(name, threading.Lock())
+        with building:
+            if name not in self._artifacts:
+                value = self._patched(name, build, patch) if patch is not None else None
+                if value is None:
+                    value = build(self)
+                with self._lock:
+                    self._artifacts[name] = value
+        return self._artifacts[name]
+
+    def _patched(self, name, build, patch):
+        if self._derived_from is None:
+            return None
+        base, upserted, removed_ids = self._derived_from
+        if isinstance(base, DatasetSnapshot):
+            # Built on the shared snapshot, where every other session reuses it
+            previous = base.artifact(name, build, patch)
+        else:
+            with self._lock:
+                previous = base.pop(name, None)
+        if previous is None:
+            return None
+        return patch(self, previous, upserted, removed_ids)
+
+    def search_index(self):
+        """The search index of this snapshot, laid over the one it derives from while that stays small"""
+        return self.artifact("search_index", build_search_index, patch_search_index)
+
+    def merged(self, changed, deleted_ids, users, jobcodes, synced_at):
+        """A new snapshot of this scope with a delta merged in and the given users and job codes.
+
+        Its artifacts are patched from the ones this snapshot had built if
+        the names they were built with are unchanged.
+        """
+        upserted, removed_ids = split_changes(changed, deleted_ids, self.scope)
+        timesheets = self.timesheets.merge(changed, deleted_ids, self.scope)
+        derived_from = None
+        if users is self.users and jobcodes is self.jobcodes:
+            with self._lock:
+                derived_from = (dict(self._artifacts), upserted, removed_ids)
+        return DatasetSnapshot(self.scope, timesheets, users, jobcodes, synced_at, derived_from)
+
+    def overlaid(self, changed, deleted_ids):
+        """A private snapshot with a session's unconfirmed writes laid over this one.
+
+        It is never published. Its artifacts are patched from this
+        snapshot's, which are built first if needed so that they are
+        shared with every other session.
+        """
+        upserted, removed_ids = split_changes(changed, deleted_ids, self.scope)
+        timesheets = self.timesheets.merge(changed, deleted_ids, self.scope)
+        return DatasetSnapshot(
+            self.scope, timesheets, self.users, self.jobcodes, self.synced_at, (self, upserted, removed_ids)
+        )
+
+    def touched_by(self, upserted, removed_ids):
+        """True if upserting ``upserted`` and removing ``removed_ids`` would change this snapshot"""
+        if upserted:
+            return True
+        return any(entry_id in self.timesheets for entry_id in removed_ids)
+
+
+class Dataset:
+    """The latest snapshot of one account scope, kept alive by the sessions and jobs holding it"""
+
+    def __init__(self, account, scope):
+        self.account = account
+        self.scope = scope
+        self.snapshot = None
+
+
+class DatasetRegistry:
+    """One ``Dataset`` per ``(account, scope)``, held only as long as some session uses it"""
+
+    def __init__(self):
+        self._datasets = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def attach(self, account, scope):
+        """Return the dataset of a scope, shared with every other session attached to it"""
+        with self._lock:
+            dataset = self._datasets.get((account, scope))
+            if dataset is None:
+                dataset = self._datasets[(account, scope)] = Dataset(account, scope)
+            return dataset
+
+    def load(self, dataset, load):
+        """Return the dataset's snapshot, publishing ``load()`` if it has none yet.
+
+        ``load`` returns ``(timesheets, users, jobcodes, synced_at)`` or None
+        and runs outside the registry lock; a snapshot published meanwhile
+        by another session wins.
+        """
+        if dataset.snapshot is None:
+            loaded = load()
+            if loaded is not None:
+                with self._lock:
+                    if dataset.snapshot is None:
+                        self._publish(dataset, *loaded)
+        return dataset.snapshot
+
+    def replace(self, dataset, timesheets, users, jobcodes, synced_at):
+        """Publish the full contents of a scope"""
+        with self._lock:
+            return self._publish(dataset, timesheets, users, jobcodes, synced_at)
+
+    def merge(self, dataset, changed, deleted_ids, users, jobcodes, synced_at, base):
+        """Publish a ``modified_since`` delta of a scope and apply it to the account's other scopes.
+
+        The delta is merged into the dataset's latest snapshot, or into
+        ``base`` (the snapshot it was requested against) if it has none.
+        """
+        with self._lock:
+            self._apply(dataset.account, changed, deleted_ids, skip=dataset)
+            current = dataset.snapshot or base
+            upserted, removed_ids = split_changes(changed, deleted_ids, dataset.scope)
+            if not current.touched_by(upserted, removed_ids) and current.users is users and current.jobcodes is jobcodes:
+                current.synced_at = synced_at
+                dataset.snapshot = current
+                return current
+            dataset.snapshot = current.merged(changed, deleted_ids, users, jobcodes, synced_at)
+            return dataset.snapshot
+
+    def apply_changes(self, account, changed, deleted_ids):
+        """Publish confirmed writes to every live scope of the account they fall in"""
+        with self._lock:
+            self._apply(account, changed, deleted_ids)
+
+    def _apply(self, account, changed, deleted_ids, skip=None):
+        for dataset in list(self._datasets.values()):
+            snapshot = dataset.snapshot
+            if dataset.account != account or dataset is skip or snapshot is None:
+                continue
+            if snapshot.touched_by(*split_changes(changed, deleted_ids, dataset.scope)):
+                dataset.snapshot = snapshot.merged(
+                    changed, deleted_ids, snapshot.users, snapshot.jobcodes, snapshot.synced_at
+                )
+
+    @staticmethod
+    def _publish(dataset, timesheets, users, jobcodes, synced_at):
+        dataset.snapshot = DatasetSnapshot(dataset.scope, timesheets, users, jobcodes, synced_at)
+        return dataset.snapshot
+
+    def stats(self):
+        """Return the number of live datasets, the timesheets their latest snapshots hold and their column bytes"""
+        snapshots = [dataset.snapshot for dataset in list(self._datasets.values()) if dataset.snapshot]
+        return {
+            "datasets": len(snapshots),
+            "timesheets": sum(len(snapshot.timesheets) for snapshot in snapshots),
+            "timesheet_bytes": sum(snapshot.timesheets.nbytes for snapshot in snapshots)
+        }
+
+
+dataset_registry = DatasetRegistry()
+telemetry.register_collector(
+    "dataset_registry", lambda: {f"dataset_registry_{name}": value for name, value in dataset_registry.stats().items()}
+)
@@ -0,0 +1,95 @@
+"""Memory-bounded memo of artifacts derived from timesheet frames.
+
+Entries are keyed on a content fingerprint of the frame plus the artifact
+name and its parameters, so any rerun or session holding the same data
+reuses the same aggregates. Least recently used entries are evicted once
+the estimated size of everything cached passes ``max_bytes``.
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from instrumentation import telemetry
+
+DERIVED_CACHE_BYTES = 256 * 1024 * 1024
+
+# Columns whose values determine every derived artifact
+FINGERPRINT_COLUMNS = ['id', 'user_id', 'jobcode_id', 'date', 'duration', 'user_name', 'jobcode_name']
+
+
+def frame_fingerprint(df):
+    """Return a content hash of a timesheet frame"""
+    hashed = pd.util.hash_pandas_object(df[FINGERPRINT_COLUMNS], index=False)
+    return hashlib.sha1(hashed.values.tobytes()).hexdigest()
+
+
+def estimate_size(value):
+    """Rough size in bytes of a cached artifact"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class DerivedCache:
+    """Thread-safe LRU of derived artifacts bounded by estimated size"""
+
+    def __init__(self, max_bytes=DERIVED_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the artifact cached under ``key``, computing and storing it on a miss.
+
+        Cached values are shared and must be treated as read-only.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = compute()
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+        return value
+
+    def stats(self):
+        """Return hit/miss counts and the number and estimated bytes of cached artifacts"""
+        with self._lock:
+            return {
+                "hits": self.hits, "misses": self.misses,
+                "entries": len(self._entries), "bytes": self._bytes
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+derived_cache = DerivedCache()
+telemetry.register_collector(
+    "derived_cache", lambda: {f"derived_cache_{name}": value for name, value in derived_cache.stats().items()}
+)
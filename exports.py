@@ -0,0 +1,139 @@
+"""Export writers used by the app's download buttons.
+
+Exports are produced lazily: the app hands ``st.download_button`` a
+zero-argument callable that Streamlit only runs when the button is
+clicked, so rendering a page no longer serializes every table up front.
+Writers work through the frame in row chunks rather than materializing
+the whole file as one string.
+"""
+import io
+import numbers
+from datetime import date
+
+import pandas as pd
+
+EXPORT_CHUNK_ROWS = 50_000
+
+# Normalized per-entry columns written to the Excel "Entries" sheet and to Parquet
+ENTRY_COLUMNS = [
+    'id', 'date', 'user_id', 'user_name', 'jobcode_id', 'jobcode_name',
+    'hours', 'duration', 'type', 'notes', 'start', 'end'
+]
+
+
+def write_csv(df, out, chunk_rows=EXPORT_CHUNK_ROWS, transform=None, positions=None):
+    """Write a DataFrame as CSV to a text stream, ``chunk_rows`` rows at a time.
+
+    ``transform`` optionally maps each chunk to the table actually written,
+    e.g. to format display columns without formatting the whole frame.
+    ``positions`` optionally selects and orders the rows to write, so a
+    sorted or filtered view is exported without copying the frame first.
+    """
+    transform = transform or (lambda chunk: chunk)
+    total = len(df) if positions is None else len(positions)
+    if total == 0:
+        transform(df.iloc[:0]).to_csv(out, index=False)
+        return
+    for start in range(0, total, chunk_rows):
+        rows = slice(start, start + chunk_rows) if positions is None else positions[start:start + chunk_rows]
+        transform(df.iloc[rows]).to_csv(out, index=False, header=start == 0)
+
+
+def csv_export(df, chunk_rows=EXPORT_CHUNK_ROWS, transform=None, positions=None):
+    """Return a callable that renders ``df`` as UTF-8 CSV when invoked"""
+    def render():
+        buffer = io.BytesIO()
+        text = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+        write_csv(df, text, chunk_rows, transform, positions)
+        text.flush()
+        text.detach()
+        buffer.seek(0)
+        return buffer
+    return render
+
+
+def _iter_chunks(df, chunk_rows, columns=None):
+    """Yield row slices of ``df``, projected onto ``columns`` one slice at a time"""
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk if columns is None else chunk[columns]
+
+
+def _write_sheet(workbook, name, df, columns, date_format, chunk_rows):
+    """Write a DataFrame to a new worksheet row by row, as constant_memory mode requires"""
+    worksheet = workbook.add_worksheet(name[:31])
+    worksheet.write_row(0, 0, [str(column) for column in (columns or df.columns)])
+    row = 1
+    for chunk in _iter_chunks(df, chunk_rows, columns):
+        for values in chunk.itertuples(index=False, name=None):
+            for col, value in enumerate(values):
+                if pd.isna(value):
+                    worksheet.write_blank(row, col, None)
+                elif isinstance(value, date):
+                    worksheet.write_datetime(row, col, value, date_format)
+                elif isinstance(value, numbers.Real) and not isinstance(value, bool):
+                    worksheet.write_number(row, col, value)
+                else:
+                    worksheet.write_string(row, col, str(value))
+            row += 1
+
+
+def write_xlsx(sheets, out, chunk_rows=EXPORT_CHUNK_ROWS, columns=None):
+    """Write ``{sheet name: DataFrame}`` as one workbook in xlsxwriter's constant_memory mode.
+
+    In that mode each row is flushed to a temporary file as soon as it is
+    written, so memory stays flat no matter how many entries are exported.
+    ``columns`` optionally maps sheet names to the columns to write.
+    """
+    import xlsxwriter
+
+    columns = columns or {}
+    workbook = xlsxwriter.Workbook(out, {'constant_memory': True, 'in_memory': False})
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+    for name, df in sheets.items():
+        _write_sheet(workbook, name, df, columns.get(name), date_format, chunk_rows)
+    workbook.close()
+
+
+def xlsx_export(frame, reports, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Return a callable that renders the entries of ``frame`` plus each report as an .xlsx workbook"""
+    def render():
+        buffer = io.BytesIO()
+        write_xlsx(
+            {'Entries': frame, **reports}, buffer, chunk_rows,
+            columns={'Entries': ENTRY_COLUMNS}
+        )
+        buffer.seek(0)
+        return buffer
+    return render
+
+
+def write_parquet(df, out, row_group_rows=EXPORT_CHUNK_ROWS, columns=None):
+    """Write a DataFrame to Parquet one row group of ``row_group_rows`` rows at a time"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if df.empty:
+        pq.write_table(pa.Table.from_pandas(df[columns or df.columns], preserve_index=False), out)
+        return
+
+    writer = None
+    try:
+        for chunk in _iter_chunks(df, row_group_rows, columns):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema, compression='snappy')
+            writer.write_table(table, row_group_size=row_group_rows)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def parquet_export(frame, row_group_rows=EXPORT_CHUNK_ROWS):
+    """Return a callable that renders the entries of ``frame`` as Parquet"""
+    def render():
+        buffer = io.BytesIO()
+        write_parquet(frame, buffer, row_group_rows, columns=ENTRY_COLUMNS)
+        buffer.seek(0)
+        return buffer
+    return render
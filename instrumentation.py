@@ -0,0 +1,173 @@
+"""In-process timers and counters for the app's hot paths.
+
+API calls, frame and index builds, report aggregations and chart rendering
+record into the process-wide ``telemetry`` registry. It has no Streamlit
+dependency, so worker threads record into it too. Snapshots can be
+exported as JSON or in the Prometheus text format, viewed in the app's
+Performance panel, or scraped from the optional metrics HTTP endpoint.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROMETHEUS_PREFIX = "tsheets_"
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def _series_key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prometheus_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+
+class Instrumentation:
+    """Thread-safe registry of timers, counters and gauge collectors"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collectors = {}
+        self.reset()
+
+    def reset(self):
+        """Forget every recorded timing and count"""
+        with self._lock:
+            self._timers = {}
+            self._counters = {}
+            self.started = time.time()
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration for the timer ``name`` with ``labels``"""
+        key = _series_key(name, labels)
+        with self._lock:
+            stats = self._timers.get(key)
+            if stats is None:
+                stats = self._timers[key] = {"count": 0, "total": 0.0, "max": 0.0}
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the body of a ``with`` block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def count(self, name, value=1, **labels):
+        """Add ``value`` to the counter ``name`` with ``labels``"""
+        key = _series_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_collector(self, name, collect):
+        """Register ``collect()`` returning ``{gauge name: value}``, read at snapshot time.
+
+        Registering the same ``name`` again replaces the previous collector.
+        """
+        with self._lock:
+            self._collectors[name] = collect
+
+    def snapshot(self):
+        """Return every timer, counter and collected gauge as plain data"""
+        with self._lock:
+            timers = dict(self._timers)
+            counters = dict(self._counters)
+            collectors = list(self._collectors.values())
+            started = self.started
+        gauges = {}
+        for collect in collectors:
+            gauges.update(collect())
+        return {
+            "uptime_seconds": round(time.time() - started, 3),
+            "timers": [
+                {
+                    "name": name, "labels": dict(labels), "count": stats["count"],
+                    "total_seconds": stats["total"], "mean_seconds": stats["total"] / stats["count"],
+                    "max_seconds": stats["max"]
+                }
+                for (name, labels), stats in sorted(timers.items())
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "gauges": gauges
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """Render the snapshot in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+
+        def declare(metric, kind):
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} {kind}")
+
+        for timer in snapshot["timers"]:
+            metric = f"{prefix}{timer['name']}_seconds"
+            labels = _prometheus_labels(sorted(timer["labels"].items()))
+            declare(metric, "summary")
+            lines.append(f"{metric}_count{labels} {timer['count']}")
+            lines.append(f"{metric}_sum{labels} {timer['total_seconds']:.6f}")
+        for timer in snapshot["timers"]:
+            metric = f"{prefix}{timer['name']}_max_seconds"
+            declare(metric, "gauge")
+            lines.append(f"{metric}{_prometheus_labels(sorted(timer['labels'].items()))} {timer['max_seconds']:.6f}")
+        for counter in snapshot["counters"]:
+            metric = f"{prefix}{counter['name']}_total"
+            declare(metric, "counter")
+            lines.append(f"{metric}{_prometheus_labels(sorted(counter['labels'].items()))} {counter['value']}")
+        for name, value in sorted(snapshot["gauges"].items()):
+            metric = f"{prefix}{name}"
+            declare(metric, "gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+telemetry = Instrumentation()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] == "/metrics.json":
+            body, content_type = telemetry.to_json(), "application/json"
+        else:
+            body, content_type = telemetry.to_prometheus(), "text/plain; version=0.0.4"
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """Serve ``/metrics`` (Prometheus text) and ``/metrics.json`` on a daemon thread, once per process"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
@@ -0,0 +1,88 @@
+"""Process-wide cache of users and jobcodes shared by every browser session.
+
+Entries are keyed by TSheets account and access-token digest, so sessions
+using the same token share one copy of the directory. Entries live for
+``REFERENCE_TTL`` seconds; after that the next reader revalidates them with
+a ``modified_since`` query rather than downloading everything again.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from tsheets_api import account_key
+from tsheets_async import fetch_reference_data
+from timesheet_sync import sync_timestamp
+
+REFERENCE_TTL = 600
+REFERENCE_CACHE_SIZE = 64
+
+
+class _Entry:
+    __slots__ = ('lock', 'users', 'jobcodes', 'synced_at', 'fetched_at')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = None
+        self.jobcodes = None
+        self.synced_at = None
+        self.fetched_at = 0.0
+
+
+def _apply_changes(records, changed):
+    """Return a copy of ``records`` with changed records merged and inactive ones dropped"""
+    merged = dict(records)
+    for record_id, record in changed.items():
+        if record.get('active') is False:
+            merged.pop(record_id, None)
+        else:
+            merged[record_id] = record
+    return merged
+
+
+class ReferenceCache:
+    """Thread-safe LRU of per-account reference data with a TTL"""
+
+    def __init__(self, max_entries=REFERENCE_CACHE_SIZE, ttl=REFERENCE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+            return entry
+
+    def get(self, token, account_id=None):
+        """Return ``(users, jobcodes)`` for a token, loading or revalidating as needed.
+
+        The returned dicts are shared between sessions and must not be
+        mutated; revalidation swaps in new dicts instead of editing them.
+        Only one caller per entry talks to the API; the rest wait for it.
+        """
+        entry = self._entry(account_key(token, account_id))
+        with entry.lock:
+            if entry.synced_at is None:
+                synced_at = sync_timestamp()
+                entry.users, entry.jobcodes = fetch_reference_data(token)
+                entry.synced_at = synced_at
+                entry.fetched_at = time.monotonic()
+            elif time.monotonic() - entry.fetched_at >= self.ttl:
+                synced_at = sync_timestamp()
+                users, jobcodes = fetch_reference_data(token, modified_since=entry.synced_at)
+                if users:
+                    entry.users = _apply_changes(entry.users, users)
+                if jobcodes:
+                    entry.jobcodes = _apply_changes(entry.jobcodes, jobcodes)
+                entry.synced_at = synced_at
+                entry.fetched_at = time.monotonic()
+            return entry.users, entry.jobcodes
+
+
+reference_cache = ReferenceCache()
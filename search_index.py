@@ -0,0 +1,133 @@
+"""Inverted index for the View Timesheets search box.
+
+Notes, user names and job code names are tokenized into lowercase words and
+each word maps to the set of timesheet ids containing it. Query terms match
+words by prefix; terms are ANDed and ``OR`` separates alternative groups,
+so ``pump OR valve repair`` finds entries mentioning pump, or both valve and
+repair. The index is built once per dataset snapshot and shared by every
+session showing it. A snapshot merged from another one lays the delta over
+the other's index with an ``OverlaySearchIndex`` instead of indexing every
+entry again, until the overlay grows past ``OVERLAY_COMPACT_FRACTION`` of
+the entries; a session's unsaved edits are searched the same way.
+"""
+import re
+from bisect import bisect_left
+
+from timesheet_table import TimesheetTable
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Timesheet fields an entry is indexed by
+INDEXED_FIELDS = ('id', 'notes', 'user_id', 'jobcode_id')
+# A snapshot's overlay is folded into a fresh index once it covers more
+# entries than this share of the snapshot, or than OVERLAY_COMPACT_MIN
+OVERLAY_COMPACT_FRACTION = 0.05
+OVERLAY_COMPACT_MIN = 1000
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(str(text).lower()) if text else []
+
+
+def name_tokens(users, jobcodes):
+    """Tokenize every user and job code name once, keyed by string id"""
+    return (
+        {user_id: tokenize(f"{user['first_name']} {user['last_name']}") for user_id, user in users.items()},
+        {job_id: tokenize(job['name']) for job_id, job in jobcodes.items()}
+    )
+
+
+def entry_tokens(entry, user_tokens, job_tokens):
+    """Return the set of tokens an entry is searchable by"""
+    tokens = set(tokenize(entry.get('notes')))
+    user_id = str(entry.get('user_id'))
+    tokens.update(user_tokens.get(user_id) or tokenize(f"User {user_id}"))
+    job_id = str(entry.get('jobcode_id'))
+    tokens.update(job_tokens.get(job_id) or tokenize(f"Job {job_id}"))
+    return tokens
+
+
+class TimesheetSearchIndex:
+    """Token -> timesheet id postings with prefix lookup"""
+
+    def __init__(self):
+        self._postings = {}
+        self._vocabulary = None
+
+    @classmethod
+    def build(cls, timesheets, users, jobcodes):
+        """Index a list of timesheet dicts or a ``TimesheetTable``"""
+        index = cls()
+        user_tokens, job_tokens = name_tokens(users, jobcodes)
+        if isinstance(timesheets, TimesheetTable):
+            timesheets = timesheets.records(INDEXED_FIELDS)
+        for entry in timesheets:
+            index._add(entry, user_tokens, job_tokens)
+        return index
+
+    def _add(self, entry, user_tokens, job_tokens):
+        entry_id = int(entry['id'])
+        for token in entry_tokens(entry, user_tokens, job_tokens):
+            self._postings.setdefault(token, set()).add(entry_id)
+        self._vocabulary = None
+
+    def _term_ids(self, term):
+        """Ids of entries with a token starting with ``term``"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        matches = set()
+        position = bisect_left(vocabulary, term)
+        while position < len(vocabulary) and vocabulary[position].startswith(term):
+            matches |= self._postings[vocabulary[position]]
+            position += 1
+        return matches
+
+    def search(self, query):
+        """Return the set of timesheet ids matching a query"""
+        result = set()
+        for clause in re.split(r"\s+OR\s+", query.strip()):
+            terms = tokenize(clause)
+            if not terms:
+                continue
+            # Intersect the rarest term first so the working set stays small
+            term_sets = sorted((self._term_ids(term) for term in terms), key=len)
+            matches = set(term_sets[0])
+            for term_set in term_sets[1:]:
+                matches &= term_set
+                if not matches:
+                    break
+            result |= matches
+        return result
+
+
+class OverlaySearchIndex:
+    """A shared index with a few entries upserted or removed, searched without copying it.
+
+    Changed entries are indexed on their own; base results for them and for
+    removed entries are dropped, so each entry is matched by one index only.
+    """
+
+    def __init__(self, base, upserted, removed_ids, users, jobcodes):
+        self._base = base
+        self._upserted = {int(entry['id']): entry for entry in upserted}
+        self._changes = TimesheetSearchIndex.build(self._upserted.values(), users, jobcodes)
+        self._hidden = {int(entry_id) for entry_id in removed_ids} | set(self._upserted)
+
+    @property
+    def size(self):
+        """Number of entries the overlay changes or removes"""
+        return len(self._hidden)
+
+    def merge(self, upserted, removed_ids, users, jobcodes):
+        """Return an overlay over the same base with a further delta applied on top of this one's"""
+        removed = {int(entry_id) for entry_id in removed_ids}
+        changed = {int(entry['id']): entry for entry in upserted}
+        kept = [entry for entry_id, entry in self._upserted.items() if entry_id not in removed and entry_id not in changed]
+        overlay = OverlaySearchIndex(self._base, kept + list(changed.values()), (), users, jobcodes)
+        overlay._hidden |= self._hidden | removed
+        return overlay
+
+    def search(self, query):
+        """Return the set of timesheet ids matching a query"""
+        return (self._base.search(query) - self._hidden) | self._changes.search(query)
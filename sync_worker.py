@@ -0,0 +1,190 @@
+"""Background timesheet sync.
+
+``SyncJob`` does on a worker thread what ``load_data`` used to do inside
+the script run: refresh users and job codes, pull the timesheets of a
+filter scope (a full fetch, or a ``modified_since`` delta merged into the
+entries already loaded), write everything to the local store and publish
+the new snapshot of the scope to every session sharing it. The
+reference refresh and the timesheet pull do not depend on each other and
+run concurrently on the shared event loop of ``tsheets_async``; storing
+and merging stay on the job's thread. Progress counters are updated as
+pages arrive so the UI can poll them; the app moves the session to the
+new snapshot on the first rerun after the job is done.
+"""
+import asyncio
+import threading
+
+from reference_cache import reference_cache
+from timesheet_store import get_store
+from timesheet_sync import sync_timestamp
+from dataset_registry import dataset_registry
+from tsheets_api import TSheetsAPIError, account_key
+from tsheets_async import AsyncTSheetsClient, run
+
+SYNC_STAGES = ["Fetching users, job codes and timesheets", "Merging timesheets", "Done"]
+
+
+class SyncProgress:
+    """Thread-safe counters describing a running sync"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stage = 0
+        self._pages = 0
+        self._rows_fetched = 0
+        self._rows_merged = 0
+
+    def set_stage(self, stage):
+        with self._lock:
+            self._stage = SYNC_STAGES.index(stage)
+
+    def add_page(self, rows):
+        """Count one fetched page of ``rows`` records; safe to call from fetch threads"""
+        with self._lock:
+            self._pages += 1
+            self._rows_fetched += rows
+
+    def set_merged(self, rows):
+        with self._lock:
+            self._rows_merged = rows
+
+    def snapshot(self):
+        """Return the current stage, its share of all stages and the counters"""
+        with self._lock:
+            return {
+                "stage": SYNC_STAGES[self._stage],
+                "fraction": self._stage / (len(SYNC_STAGES) - 1),
+                "pages": self._pages,
+                "rows_fetched": self._rows_fetched,
+                "rows_merged": self._rows_merged
+            }
+
+
+class SyncResult:
+    """What a finished sync hands back to the session.
+
+    ``users``/``jobcodes`` are None if the reference refresh failed
+    (``reference_error``) and ``snapshot`` is None if the timesheet pull
+    failed (``error``).
+    """
+
+    def __init__(self):
+        self.users = None
+        self.jobcodes = None
+        self.reference_error = None
+        self.snapshot = None
+        self.error = None
+
+
+class SyncJob:
+    """One sync of a filter scope's dataset, run on its own daemon thread.
+
+    Given the ``base`` snapshot the session shows, only the changes since
+    it was synced are fetched.
+    """
+
+    def __init__(self, token, account_id, dataset, date_range, params, window_days=None,
+                 base=None, users=None, jobcodes=None):
+        self.token = token
+        self.account_id = account_id
+        self.dataset = dataset
+        self.scope = dataset.scope
+        self.date_range = date_range
+        self.params = params
+        self.window_days = window_days
+        self.base = base
+        self.incremental = base is not None
+        self.users = users
+        self.jobcodes = jobcodes
+        self.progress = SyncProgress()
+        self.result = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="timesheet-sync", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def _run(self):
+        try:
+            self.result = self._sync()
+        except Exception as e:
+            # Surface anything unexpected to the UI instead of leaving the job running forever
+            self.result = SyncResult()
+            self.result.error = TSheetsAPIError(f"Sync failed: {e}")
+        finally:
+            self.progress.set_stage("Done")
+            self._done.set()
+
+    def _sync(self):
+        store = get_store()
+        account = account_key(self.token, self.account_id)
+        result = SyncResult()
+        synced_at = sync_timestamp()
+
+        self.progress.set_stage("Fetching users, job codes and timesheets")
+        reference, timesheets = run(self._fetch())
+
+        if isinstance(reference, TSheetsAPIError):
+            result.reference_error = reference
+        elif isinstance(reference, BaseException):
+            raise reference
+        else:
+            result.users, result.jobcodes = reference
+            # The cache hands out the same dicts until they change; only persist new ones
+            if result.users is not self.users:
+                store.save_reference(account, 'users', result.users)
+            if result.jobcodes is not self.jobcodes:
+                store.save_reference(account, 'jobcodes', result.jobcodes)
+
+        if isinstance(timesheets, TSheetsAPIError):
+            result.error = timesheets
+            return result
+        if isinstance(timesheets, BaseException):
+            raise timesheets
+
+        self.progress.set_stage("Merging timesheets")
+        # Keep the users and job codes already shown if their refresh failed
+        users = result.users if result.users is not None else self.users
+        jobcodes = result.jobcodes if result.jobcodes is not None else self.jobcodes
+        if self.incremental:
+            changed, deleted_ids = timesheets
+            store.apply_changes(account, changed.values(), deleted_ids)
+            result.snapshot = dataset_registry.merge(
+                self.dataset, changed, deleted_ids, users, jobcodes, synced_at, self.base
+            )
+            self.progress.set_merged(len(changed) + len(deleted_ids))
+        else:
+            store.replace_scope(account, self.scope, timesheets)
+            result.snapshot = dataset_registry.replace(self.dataset, timesheets, users, jobcodes, synced_at)
+            self.progress.set_merged(len(timesheets))
+        store.set_synced_at(account, self.scope, synced_at)
+        return result
+
+    async def _fetch(self):
+        """Return the reference data and the timesheets, or the exception each one raised.
+
+        Users and job codes come from the cache shared by all sessions on
+        this account; it is thread-based, so it runs beside the timesheet
+        pull on a helper thread.
+        """
+        return await asyncio.gather(
+            asyncio.to_thread(reference_cache.get, self.token, self.account_id),
+            self._fetch_timesheets(),
+            return_exceptions=True
+        )
+
+    async def _fetch_timesheets(self):
+        """Return ``(changed, deleted_ids)`` for a delta, or the list of timesheets for a full load"""
+        client = AsyncTSheetsClient(self.token)
+        if self.incremental:
+            return await client.fetch_timesheet_changes(self.base.synced_at, on_page=self.progress.add_page)
+        start_date, end_date = self.date_range
+        return await client.fetch_timesheets(
+            start_date, end_date, params=self.params,
+            window_days=self.window_days, on_page=self.progress.add_page
+        )
@@ -0,0 +1,45 @@
+"""Requests sent by ``AsyncTSheetsClient.fetch_all_pages`` against a stub list endpoint."""
+import httpx
+import pytest
+
+import tsheets_async
+from tsheets_async import AsyncTSheetsClient, run
+
+LIMIT = 10
+URL = "https://tsheets.test/api/v1/timesheets"
+
+
+def stub_client(pages, requested):
+    """An httpx client answering like a timesheets endpoint with ``pages`` pages, the last one short"""
+    total = (pages - 1) * LIMIT + LIMIT // 2
+
+    def handler(request):
+        page = int(request.url.params['page'])
+        requested.append(page)
+        ids = range((page - 1) * LIMIT, min(page * LIMIT, total))
+        return httpx.Response(200, json={
+            "results": {"timesheets": {str(i): {"id": i} for i in ids}},
+            "more": page * LIMIT < total
+        })
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), total
+
+
+@pytest.mark.parametrize("pages", [3, 4, 5, 6])
+def test_fetch_all_pages_stops_after_the_wave_with_the_last_page(monkeypatch, pages):
+    requested = []
+    client, total = stub_client(pages, requested)
+    monkeypatch.setattr(tsheets_async, "get_http_client", lambda: client)
+
+    async def fetch():
+        return await AsyncTSheetsClient(f"pages-{pages}").fetch_all_pages(URL, 'timesheets', limit=LIMIT)
+
+    records = run(fetch())
+
+    # Waves of 1, 1, 2, 4... pages end at page 2, 4, 8...
+    wave_end = 2
+    while wave_end < pages:
+        wave_end *= 2
+    assert len(records) == total
+    assert sorted(requested) == list(range(1, len(requested) + 1))
+    assert pages <= len(requested) <= wave_end
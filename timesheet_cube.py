@@ -0,0 +1,82 @@
+"""Pre-aggregated day x user x job code cube of the timesheet frame.
+
+Every report groups by some combination of day, user and job code (or
+coarser calendar parts of the day), so they can all roll up from one cell
+per (day, user, job code) instead of scanning the raw entries. Cells keep
+the summed hours and entry count; because user and job code are cube
+dimensions, distinct user/job counts at any rollup are exact ``nunique``
+calls over the cells. ``patch_cube`` re-aggregates only the cells a few
+changed entries fall in.
+"""
+import numpy as np
+import pandas as pd
+
+from timesheet_frame import with_categories
+
+CUBE_DIMENSIONS = ['date', 'user_id', 'jobcode_id', 'user_name', 'jobcode_name']
+
+# Past this many changed rows a patched frame gets a new cube instead
+CUBE_PATCH_MAX_ROWS = 1000
+
+
+def build_cube(df):
+    """Aggregate a timesheet frame to one row per day, user and job code.
+
+    Columns: the dimensions in ``CUBE_DIMENSIONS``, ``hours`` (sum),
+    ``entries`` (count) and the ``week``/``month``/``year`` of the day.
+    """
+    cube = (
+        df.groupby(CUBE_DIMENSIONS, observed=True, sort=False)
+        .agg(hours=('hours', 'sum'), entries=('hours', 'count'))
+        .reset_index()
+    )
+    cube['week'] = cube['date'].dt.isocalendar().week
+    cube['month'] = cube['date'].dt.month
+    cube['year'] = cube['date'].dt.year
+    return cube
+
+
+def patch_cube(cube, frame, touched):
+    """The cube of ``frame`` from the cube of a frame it was patched from.
+
+    ``touched`` holds the rows the patch changed, both as they were and as
+    they are now. Cells sharing a day, user and job code with one of them
+    are aggregated again from ``frame``; the rest are kept.
+    """
+    if len(touched) > CUBE_PATCH_MAX_ROWS:
+        return build_cube(frame)
+
+    def touching(df):
+        rows = np.arange(len(df))
+        for column in ('date', 'user_id', 'jobcode_id'):
+            rows = rows[np.isin(df[column].to_numpy()[rows], touched[column].to_numpy())]
+        mask = np.zeros(len(df), dtype=bool)
+        mask[rows] = True
+        return mask
+
+    kept = with_categories(cube[~touching(cube)], frame)
+    return pd.concat([kept, build_cube(frame[touching(frame)])], ignore_index=True)
+
+
+def rollup(cube, keys, measures):
+    """Group cube cells by ``keys`` and compute the named ``measures``.
+
+    ``measures`` maps output column names to one of ``"hours"``,
+    ``"entries"``, ``"mean_hours"``, ``"users"`` or ``"jobs"``.
+    """
+    needed = set(measures.values())
+    aggregations = {}
+    if needed & {"hours", "mean_hours"}:
+        aggregations['hours'] = ('hours', 'sum')
+    if needed & {"entries", "mean_hours"}:
+        aggregations['entries'] = ('entries', 'sum')
+    if "users" in needed:
+        aggregations['users'] = ('user_id', 'nunique')
+    if "jobs" in needed:
+        aggregations['jobs'] = ('jobcode_id', 'nunique')
+
+    grouped = cube.groupby(keys, observed=True).agg(**aggregations)
+    if "mean_hours" in needed:
+        grouped['mean_hours'] = grouped['hours'] / grouped['entries']
+    result = pd.DataFrame({name: grouped[measure] for name, measure in measures.items()})
+    return result.reset_index()
@@ -0,0 +1,154 @@
+"""Normalized pandas frame of the loaded timesheets.
+
+Every view used to rebuild its own DataFrame with per-row ``apply`` calls.
+``build_timesheet_frame`` does the work once with typed columns and
+map-based joins against the users/jobcodes tables; the app caches the
+result per snapshot. ``patch_timesheet_frame`` derives the frame of a
+snapshot with a few entries changed from the frame it was merged from,
+building only the changed rows.
+"""
+import numpy as np
+import pandas as pd
+
+from timesheet_table import TimesheetTable
+
+# Raw TSheets fields the views read; everything else is left out of the frame
+FRAME_FIELDS = ['id', 'user_id', 'jobcode_id', 'date', 'duration', 'type', 'notes', 'start', 'end']
+
+
+def raw_frame(timesheets, fields):
+    """The raw ``fields`` of a list of timesheet dicts or a ``TimesheetTable`` as a frame"""
+    if isinstance(timesheets, TimesheetTable):
+        return pd.DataFrame(timesheets.columns(fields))
+    return pd.DataFrame.from_records(timesheets, columns=fields)
+
+
+def user_names(users):
+    """Return a Series mapping integer user id to display name"""
+    return pd.Series(
+        {int(user_id): f"{user['first_name']} {user['last_name']}" for user_id, user in users.items()},
+        dtype=object
+    )
+
+
+def jobcode_names(jobcodes):
+    """Return a Series mapping integer job code id to name"""
+    return pd.Series(
+        {int(job_id): job['name'] for job_id, job in jobcodes.items()},
+        dtype=object
+    )
+
+
+def format_durations(seconds):
+    """Vectorized ``format_duration``: seconds to ``"{h}h {m}m"`` labels"""
+    seconds = seconds.astype('int64')
+    hours = (seconds // 3600).astype(str)
+    minutes = (seconds % 3600 // 60).astype(str)
+    return hours + "h " + minutes + "m"
+
+
+def build_timesheet_frame(timesheets, users, jobcodes):
+    """Build the frame shared by the Dashboard, View, Edit and Reports views.
+
+    Columns: ``id``, ``user_id``, ``jobcode_id`` and ``duration`` as int64,
+    ``date`` as datetime64, ``hours`` as float, ``user_name``,
+    ``jobcode_name`` and ``type`` as categoricals, ``notes``, ``start``,
+    ``end``, ``duration_label`` and the ``week``/``month``/``year`` parts
+    of the date used by the reports.
+    """
+    df = raw_frame(timesheets, FRAME_FIELDS)
+    for column in ('id', 'user_id', 'jobcode_id', 'duration'):
+        df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype('int64')
+
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
+    df['hours'] = df['duration'] / 3600
+    df['duration_label'] = format_durations(df['duration'])
+
+    df['user_name'] = (
+        df['user_id'].map(user_names(users))
+        .fillna("User " + df['user_id'].astype(str))
+        .astype('category')
+    )
+    df['jobcode_name'] = (
+        df['jobcode_id'].map(jobcode_names(jobcodes))
+        .fillna("Job " + df['jobcode_id'].astype(str))
+        .astype('category')
+    )
+    df['type'] = df['type'].fillna('').astype('category')
+    df['notes'] = df['notes'].fillna('').astype(str)
+
+    df['week'] = df['date'].dt.isocalendar().week
+    df['month'] = df['date'].dt.month
+    df['year'] = df['date'].dt.year
+    return df
+
+
+class FramePatch:
+    """A frame patched with ``patch_timesheet_frame`` and how its rows relate to the frame it came from.
+
+    ``kept`` maps each row of the original frame to its row in ``frame``,
+    or -1 if it was removed or replaced; ``changed`` holds the rows of
+    ``frame`` that were replaced or added, and ``dropped`` the original
+    rows that were removed or replaced.
+    """
+
+    def __init__(self, frame, kept, changed, dropped):
+        self.frame = frame
+        self.kept = kept
+        self.changed = changed
+        self.dropped = dropped
+
+    @property
+    def touched(self):
+        """The rows the patch changed, as they were and as they are now"""
+        return pd.concat([self.dropped, self.frame.take(self.changed)], ignore_index=True)
+
+
+def with_categories(df, like):
+    """``df`` with its categorical columns recoded to the categories of the same columns of ``like``"""
+    recoded = {
+        column: df[column].cat.set_categories(like[column].cat.categories)
+        for column in df.columns
+        if isinstance(df[column].dtype, pd.CategoricalDtype)
+        and not df[column].cat.categories.equals(like[column].cat.categories)
+    }
+    return df.assign(**recoded) if recoded else df
+
+
+def patch_timesheet_frame(frame, upserted, removed_ids, users, jobcodes):
+    """Lay a delta over a frame from ``build_timesheet_frame`` and return a ``FramePatch``.
+
+    Only the ``upserted`` entries are built; they replace the rows with
+    their id in place and the others are appended, the rows of
+    ``removed_ids`` are dropped, so the rows come out in the order
+    ``TimesheetTable.merge`` leaves the entries in.
+    """
+    added = build_timesheet_frame(list(upserted), users, jobcodes)
+    recoded = {}
+    for column in ('user_name', 'jobcode_name', 'type'):
+        categories = frame[column].cat.categories
+        new = added[column].cat.categories.difference(categories)
+        if len(new):
+            recoded[column] = frame[column].cat.set_categories(categories.append(new))
+    frame = frame.assign(**recoded) if recoded else frame
+    added = added.astype(frame.dtypes.to_dict())
+
+    count = len(frame)
+    targets = pd.Index(frame['id']).get_indexer(added['id'])
+    updated = targets >= 0
+    removed = (
+        frame['id'].isin([int(entry_id) for entry_id in removed_ids]) & ~frame['id'].isin(added['id'])
+    ).to_numpy()
+
+    rows = np.arange(count)
+    rows[targets[updated]] = count + np.flatnonzero(updated)
+    rows = np.concatenate([rows[~removed], count + np.flatnonzero(~updated)])
+    patched = pd.concat([frame, added], ignore_index=True).take(rows).reset_index(drop=True)
+
+    kept = np.full(count, -1, dtype=np.int64)
+    kept[~removed] = np.arange(count - removed.sum())
+    replaced = targets[updated]
+    changed = np.concatenate([kept[replaced], np.arange(count - removed.sum(), len(patched))])
+    kept[replaced] = -1
+    dropped = frame.take(np.flatnonzero(kept < 0))
+    return FramePatch(patched, kept, changed, dropped)
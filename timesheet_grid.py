@@ -0,0 +1,128 @@
+"""Paged timesheet grid for the View Timesheets and Edit Entry views.
+
+The grid works on row positions into the typed timesheet frame rather
+than on sorted copies of it. ``SortOrders`` computes each sort option's
+permutation once per snapshot from numeric keys, so re-sorting is a
+lookup and searching is a mask over the permutation; a snapshot with a
+few entries changed merges those rows into the permutations of the one
+it came from rather than sorting again. Only the rows of the visible
+page are taken from the frame, formatted and sent to the browser, so the
+table payload stays the same size however many entries are loaded.
+"""
+import math
+
+import numpy as np
+
+PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_PAGE_SIZE = 50
+
+SORT_OPTIONS = ["Date", "User", "Job Code", "Duration"]
+
+# Past this many changed rows a patched frame is sorted again instead of merged
+SORT_MERGE_MAX_ROWS = 1000
+
+# Display columns of the View Timesheets grid and the Edit Entry picker table
+GRID_COLUMNS = ["ID", "User", "Job Code", "Date", "Duration", "Type", "Notes"]
+SELECTION_COLUMNS = ["ID", "User", "Job Code", "Date", "Duration"]
+
+
+class SortOrders:
+    """Row permutations of a timesheet frame for each ``SORT_OPTIONS`` choice, computed on first use"""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._orders = {}
+
+    def positions(self, sort_by):
+        """Frame row positions in ``sort_by`` order: newest, by name, or longest first"""
+        order = self._orders.get(sort_by)
+        if order is None:
+            order = self._orders[sort_by] = self._sort(sort_by)
+        return order
+
+    def patched(self, patch):
+        """The orders of the frame of a ``FramePatch`` of this frame, merging its changed rows into the orders computed so far"""
+        orders = SortOrders(patch.frame)
+        changed = patch.changed
+        if len(changed) > SORT_MERGE_MAX_ROWS:
+            return orders
+        for sort_by, order in self._orders.items():
+            keys = orders._keys(sort_by)
+            kept = patch.kept[order]
+            kept = kept[kept >= 0]
+            # Changed rows go after kept rows with the same key that come before them in the frame
+            changed = changed[np.lexsort((changed, keys[changed]))]
+            kept_keys = keys[kept]
+            starts = np.searchsorted(kept_keys, keys[changed], side='left')
+            ends = np.searchsorted(kept_keys, keys[changed], side='right')
+            at = [start + np.searchsorted(kept[start:end], row) for row, start, end in zip(changed, starts, ends)]
+            orders._orders[sort_by] = np.insert(kept, np.array(at, dtype=np.int64), changed)
+        return orders
+
+    def _sort(self, sort_by):
+        return np.argsort(self._keys(sort_by), kind='stable')
+
+    def _keys(self, sort_by):
+        """Per-row keys whose stable ascending order is the ``sort_by`` order"""
+        frame = self.frame
+        if sort_by == "Date":
+            # Descending; entries without a date go last, as with sort_values
+            days = frame['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+            return np.where(frame['date'].isna().to_numpy(), np.iinfo(np.int64).max, -days)
+        if sort_by == "User":
+            return _name_ranks(frame['user_name'])
+        if sort_by == "Job Code":
+            return _name_ranks(frame['jobcode_name'])
+        if sort_by == "Duration":
+            return -frame['duration'].to_numpy()
+        return np.zeros(len(frame), dtype=np.int64)
+
+
+def _name_ranks(names):
+    """Alphabetical rank of each value of a categorical name column, sorting only its categories"""
+    categories = names.cat.categories.astype(str)
+    rank = np.empty(len(categories), dtype=np.int64)
+    rank[np.argsort(categories.to_numpy(), kind='stable')] = np.arange(len(categories))
+    return rank[names.cat.codes.to_numpy()]
+
+
+def filter_positions(frame, positions, matching_ids=None):
+    """The ``positions`` whose row id is in ``matching_ids``, keeping their order; all when it is None"""
+    if matching_ids is None:
+        return positions
+    matches = frame['id'].isin(matching_ids).to_numpy()
+    return positions[matches[positions]]
+
+
+def page_count(total_rows, page_size):
+    """Number of pages needed for ``total_rows``; an empty table still has one page"""
+    return max(1, math.ceil(total_rows / page_size))
+
+
+def page_rows(frame, positions, page, page_size):
+    """Frame rows at the ``positions`` shown on 1-based ``page``"""
+    start = (page - 1) * page_size
+    return frame.iloc[positions[start:start + page_size]]
+
+
+def display_rows(rows, columns=GRID_COLUMNS):
+    """Format frame rows as the grid's display table with the given columns"""
+    formatters = {
+        "ID": lambda: rows['id'],
+        "User": lambda: rows['user_name'].astype(str),
+        "Job Code": lambda: rows['jobcode_name'].astype(str),
+        "Date": lambda: rows['date'].dt.strftime('%Y-%m-%d'),
+        "Duration": lambda: rows['duration_label'],
+        "Type": lambda: rows['type'].astype(str).str.capitalize(),
+        "Notes": lambda: rows['notes']
+    }
+    return rows[[]].assign(**{column: formatters[column]() for column in columns})
+
+
+def entry_labels(rows):
+    """Picker labels ``"{id} · {user} · {date}"`` for frame rows, keyed by id"""
+    labels = (
+        rows['id'].astype(str) + " · " + rows['user_name'].astype(str)
+        + " · " + rows['date'].dt.strftime('%Y-%m-%d')
+    )
+    return dict(zip(rows['id'].tolist(), labels))
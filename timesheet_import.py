@@ -0,0 +1,198 @@
+"""Bulk import of timesheet entries from CSV or Excel files.
+
+Uploads are read in chunks of ``IMPORT_CHUNK_ROWS`` rows and validated with
+column operations rather than row by row: times must parse, carry a UTC
+offset and end after they start, user and job code ids must be known,
+and an entry may not overlap another entry of the same user in the file
+or in the loaded data.
+Valid rows become timesheet dicts ready for ``bulk_mutate_timesheets``;
+rejected rows are collected with their reason for a downloadable error file.
+"""
+import pandas as pd
+
+from timesheet_frame import raw_frame
+
+IMPORT_CHUNK_ROWS = 10_000
+
+REQUIRED_COLUMNS = ['user_id', 'jobcode_id', 'start', 'end']
+OPTIONAL_COLUMNS = ['date', 'type', 'notes']
+
+# Spreadsheet line of the first data row: line 1 holds the header
+FIRST_DATA_LINE = 2
+
+
+def _normalize_columns(df):
+    df.columns = [str(column).strip().lower() for column in df.columns]
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    for column in OPTIONAL_COLUMNS:
+        if column not in df.columns:
+            df[column] = ''
+    return df[REQUIRED_COLUMNS + OPTIONAL_COLUMNS]
+
+
+def _read_xlsx(file, chunk_rows):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        chunk = []
+        for values in rows:
+            chunk.append(values)
+            if len(chunk) == chunk_rows:
+                yield pd.DataFrame(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
+
+
+def read_import(file, filename, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Yield an uploaded CSV or .xlsx file as DataFrames of at most ``chunk_rows`` rows.
+
+    Every chunk has the required and optional columns as text, with a
+    ``line`` column holding the row's line number in the source file.
+    """
+    if filename.lower().endswith(('.xlsx', '.xlsm')):
+        chunks = _read_xlsx(file, chunk_rows)
+    else:
+        chunks = pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+    line = FIRST_DATA_LINE
+    for chunk in chunks:
+        chunk = _normalize_columns(chunk).fillna('').astype(str)
+        chunk.insert(0, 'line', range(line, line + len(chunk)))
+        line += len(chunk)
+        yield chunk.reset_index(drop=True)
+
+
+# A time of day followed by ``Z`` or a ``+hh:mm``/``-hhmm``/``+hh`` UTC offset
+UTC_OFFSET_PATTERN = r'\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:Z|[+-]\d{2}(?::?\d{2})?)$'
+
+
+def _parse_times(values):
+    return pd.to_datetime(values.str.strip(), utc=True, errors='coerce', format='ISO8601')
+
+
+def _has_offset(values):
+    """True for timestamps that carry a UTC offset; pandas would read the others as UTC"""
+    return values.str.strip().str.contains(UTC_OFFSET_PATTERN, case=False, regex=True)
+
+
+def validate_chunk(chunk, users, jobcodes):
+    """Check one chunk of import rows on their own.
+
+    Returns the chunk with parsed ``start_at``/``end_at`` columns, integer
+    ids and an ``error`` column that is empty for rows passing every check.
+    """
+    chunk = chunk.copy()
+    chunk['start_at'] = _parse_times(chunk['start'])
+    chunk['end_at'] = _parse_times(chunk['end'])
+    user_ids = pd.to_numeric(chunk['user_id'], errors='coerce')
+    jobcode_ids = pd.to_numeric(chunk['jobcode_id'], errors='coerce')
+    known_users = {int(user_id) for user_id in users}
+    known_jobcodes = {int(job_id) for job_id in jobcodes}
+
+    checks = [
+        (chunk['start_at'].isna(), "Start time is not a valid ISO 8601 timestamp"),
+        (chunk['end_at'].isna(), "End time is not a valid ISO 8601 timestamp"),
+        (~_has_offset(chunk['start']), "Start time has no UTC offset"),
+        (~_has_offset(chunk['end']), "End time has no UTC offset"),
+        (chunk['end_at'] <= chunk['start_at'], "End time must be after start time"),
+        (~user_ids.isin(known_users), "Unknown user_id"),
+        (~jobcode_ids.isin(known_jobcodes), "Unknown jobcode_id"),
+    ]
+    error = pd.Series('', index=chunk.index)
+    for failed, message in checks:
+        error = error.mask(failed & (error == ''), message)
+
+    chunk['user_id'] = user_ids.fillna(0).astype('int64')
+    chunk['jobcode_id'] = jobcode_ids.fillna(0).astype('int64')
+    chunk['error'] = error
+    return chunk
+
+
+def flag_overlaps(rows, timesheets):
+    """Set ``error`` on valid import rows overlapping another entry of the same user.
+
+    Imported rows are compared with each other and with ``timesheets``, the
+    entries already loaded. After sorting each user's intervals by start, an
+    interval overlaps another exactly when it starts before the latest end
+    seen so far or ends after the next interval starts.
+    """
+    valid = rows[rows['error'] == '']
+    existing = raw_frame(timesheets, ['user_id', 'start', 'end'])
+    intervals = pd.concat([
+        pd.DataFrame({
+            'row': valid.index, 'user_id': valid['user_id'],
+            'start_at': valid['start_at'], 'end_at': valid['end_at']
+        }),
+        pd.DataFrame({
+            'row': -1,
+            'user_id': pd.to_numeric(existing['user_id'], errors='coerce'),
+            'start_at': _parse_times(existing['start'].fillna('').astype(str)),
+            'end_at': _parse_times(existing['end'].fillna('').astype(str))
+        }).dropna()
+    ], ignore_index=True).sort_values(['user_id', 'start_at'], kind='stable')
+
+    by_user = intervals.groupby('user_id', sort=False)
+    latest_end = by_user['end_at'].cummax().groupby(intervals['user_id']).shift()
+    next_start = by_user['start_at'].shift(-1)
+    overlapping = (intervals['start_at'] < latest_end) | (intervals['end_at'] > next_start)
+    flagged = intervals.loc[overlapping & (intervals['row'] >= 0), 'row']
+    rows.loc[flagged, 'error'] = "Overlaps another entry for this user"
+    return rows
+
+
+def validate_import(chunks, users, jobcodes, timesheets):
+    """Validate every chunk of an import and return ``(valid, rejected)`` DataFrames"""
+    checked = [validate_chunk(chunk, users, jobcodes) for chunk in chunks]
+    if not checked:
+        empty = pd.DataFrame(columns=['line'] + REQUIRED_COLUMNS + OPTIONAL_COLUMNS + ['error'])
+        return empty, empty
+    rows = flag_overlaps(pd.concat(checked, ignore_index=True), timesheets)
+    passed = rows['error'] == ''
+    return rows[passed], rows[~passed]
+
+
+def import_entries(valid):
+    """Turn validated import rows into timesheet dicts in row order"""
+    dates = valid['date'].str.strip().mask(valid['date'].str.strip() == '', valid['start'].str.strip().str[:10])
+    types = valid['type'].str.strip().str.lower().mask(valid['type'].str.strip() == '', 'regular')
+    return [
+        {
+            "user_id": int(user_id),
+            "jobcode_id": int(jobcode_id),
+            "type": entry_type,
+            "start": start.strip(),
+            "end": end.strip(),
+            "date": entry_date,
+            "notes": notes
+        }
+        for user_id, jobcode_id, entry_type, start, end, entry_date, notes in zip(
+            valid['user_id'], valid['jobcode_id'], types, valid['start'], valid['end'], dates, valid['notes']
+        )
+    ]
+
+
+def error_report(rejected, failed=(), entry_lines=None):
+    """Build the per-row error file from rejected rows and failed uploads.
+
+    ``failed`` holds the ``(entry, error)`` pairs returned by the upload and
+    ``entry_lines`` maps ``id(entry)`` to the entry's source line.
+    """
+    columns = ['line'] + REQUIRED_COLUMNS + OPTIONAL_COLUMNS + ['error']
+    report = rejected[columns].astype({'user_id': str, 'jobcode_id': str})
+    if failed:
+        uploaded = pd.DataFrame([
+            {'line': entry_lines.get(id(entry)), **{c: entry.get(c, '') for c in columns[1:-1]}, 'error': error.message}
+            for entry, error in failed
+        ], columns=columns)
+        report = pd.concat([report, uploaded], ignore_index=True)
+    return report.sort_values('line', kind='stable').reset_index(drop=True)
@@ -0,0 +1,33 @@
+"""Constant-time lookups used by the View Timesheets and Edit Entry flows.
+
+Entries are looked up by id on the ``TimesheetTable`` itself.
+``ReferenceOptions`` holds the user and job code selectbox labels
+together with each id's position in them, built once per users/jobcodes
+snapshot.
+"""
+
+
+class ReferenceOptions:
+    """Selectbox labels and positions for users and job codes, keyed by string id"""
+
+    def __init__(self, users, jobcodes):
+        self.users = users
+        self.jobcodes = jobcodes
+        self.user_labels = {
+            user_id: f"{user['first_name']} {user['last_name']}" for user_id, user in users.items()
+        }
+        self.jobcode_labels = {job_id: job['name'] for job_id, job in jobcodes.items()}
+        self.user_positions = {user_id: position for position, user_id in enumerate(self.user_labels)}
+        self.jobcode_positions = {job_id: position for position, job_id in enumerate(self.jobcode_labels)}
+
+    def is_for(self, users, jobcodes):
+        """True if built from these exact users and jobcodes dicts"""
+        return self.users is users and self.jobcodes is jobcodes
+
+    def user_position(self, user_id):
+        """Position of a user in ``user_labels``, or 0 if unknown"""
+        return self.user_positions.get(str(user_id), 0)
+
+    def jobcode_position(self, jobcode_id):
+        """Position of a job code in ``jobcode_labels``, or 0 if unknown"""
+        return self.jobcode_positions.get(str(jobcode_id), 0)
@@ -0,0 +1,109 @@
+"""Aggregates and report tables derived from the timesheet cube.
+
+Each function takes the cube from ``timesheet_cube.build_cube`` and returns
+a new object without touching its input, so the results can be memoized and
+shared between reruns and sessions. Their cost grows with the number of
+cube cells, not with the number of raw entries.
+"""
+from timesheet_cube import rollup
+
+# Columns of the Weekly Summary shown in the table and exports
+WEEKLY_DISPLAY_COLUMNS = [
+    'Week Label', 'Total Hours', 'Average Hours', 'Entry Count',
+    'Unique Users', 'Unique Jobs'
+]
+
+CUSTOM_GROUPS = ["User", "Job Code", "Date", "Week", "Month", "Year"]
+
+CUSTOM_METRICS = {
+    "Total Hours": "hours",
+    "Average Hours": "mean_hours",
+    "Entry Count": "entries",
+    "Unique Users": "users",
+    "Unique Jobs": "jobs"
+}
+
+
+def summary_metrics(cube):
+    """Return the Dashboard headline numbers"""
+    total_hours = float(cube['hours'].sum())
+    days = cube['date'].nunique()
+    return {
+        "total_hours": total_hours,
+        "unique_users": int(cube['user_id'].nunique()),
+        "unique_jobs": int(cube['jobcode_id'].nunique()),
+        "avg_daily_hours": total_hours / days if days else 0
+    }
+
+
+def hours_by_user(cube):
+    """Total hours per user name, largest first"""
+    return rollup(cube, ['user_name'], {'hours': 'hours'}).sort_values('hours', ascending=False)
+
+
+def hours_by_job(cube):
+    """Total hours per job code name, largest first"""
+    return rollup(cube, ['jobcode_name'], {'hours': 'hours'}).sort_values('hours', ascending=False)
+
+
+def daily_hours(cube):
+    """Total hours per calendar day"""
+    return rollup(cube, [cube['date'].dt.date], {'hours': 'hours'})
+
+
+def user_report(cube):
+    """Hours by User report table"""
+    report = rollup(cube, ['user_name'], {
+        'Total Hours': 'hours', 'Average Hours': 'mean_hours', 'Entry Count': 'entries'
+    })
+    report = report.rename(columns={'user_name': 'User'})
+    return report.sort_values('Total Hours', ascending=False)
+
+
+def job_report(cube):
+    """Hours by Job Code report table"""
+    report = rollup(cube, ['jobcode_name'], {
+        'Total Hours': 'hours', 'Average Hours': 'mean_hours', 'Entry Count': 'entries'
+    })
+    report = report.rename(columns={'jobcode_name': 'Job Code'})
+    return report.sort_values('Total Hours', ascending=False)
+
+
+def daily_report(cube):
+    """Daily Summary report table, newest day first"""
+    report = rollup(cube, [cube['date'].dt.date.rename('Date')], {
+        'Total Hours': 'hours', 'Average Hours': 'mean_hours', 'Entry Count': 'entries',
+        'Unique Users': 'users', 'Unique Jobs': 'jobs'
+    })
+    return report.sort_values('Date', ascending=False)
+
+
+def weekly_report(cube):
+    """Weekly Summary report table with a display label per ISO week, newest first"""
+    keys = [cube['year'].rename('Year'), cube['week'].rename('Week')]
+    report = rollup(cube, keys, {
+        'Total Hours': 'hours', 'Average Hours': 'mean_hours', 'Entry Count': 'entries',
+        'Unique Users': 'users', 'Unique Jobs': 'jobs'
+    })
+    span = cube.groupby(keys)['date'].agg(['min', 'max']).reset_index(drop=True)
+    report['Start Date'] = span['min']
+    report['End Date'] = span['max']
+    report['Week Label'] = (
+        "Week " + report['Week'].astype(int).astype(str) + ": "
+        + report['Start Date'].dt.strftime('%b %d') + " - " + report['End Date'].dt.strftime('%b %d')
+    )
+    return report.sort_values(['Year', 'Week'], ascending=[False, False])
+
+
+def custom_report(cube, group_by, metrics):
+    """Custom Report table grouped by ``group_by`` labels with one column per metric label"""
+    group_columns = {
+        "User": cube['user_name'],
+        "Job Code": cube['jobcode_name'],
+        "Date": cube['date'].dt.date,
+        "Week": cube['week'],
+        "Month": cube['month'],
+        "Year": cube['year']
+    }
+    keys = [group_columns[g].rename(g) for g in group_by]
+    return rollup(cube, keys, {m: CUSTOM_METRICS[m] for m in metrics})
@@ -0,0 +1,157 @@
+"""On-disk SQLite copy of timesheets and reference data.
+
+The store outlives browser sessions and server restarts, so a new session
+can render what was last synced straight away and then catch up with a
+``modified_since`` delta. Rows are partitioned by account key (account id
+plus token digest) and indexed by id, date, user and job code.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "timesheets.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS timesheets (
+    account TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    user_id INTEGER,
+    jobcode_id INTEGER,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (account, id)
+);
+CREATE INDEX IF NOT EXISTS timesheets_date ON timesheets (account, date);
+CREATE INDEX IF NOT EXISTS timesheets_user ON timesheets (account, user_id, date);
+CREATE INDEX IF NOT EXISTS timesheets_jobcode ON timesheets (account, jobcode_id, date);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    account TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    PRIMARY KEY (account, scope)
+);
+
+CREATE TABLE IF NOT EXISTS reference_data (
+    account TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (account, kind)
+);
+"""
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _scope_filter(scope):
+    """Return a WHERE clause and parameters selecting the rows of a filter scope"""
+    start_date, end_date, user_id, jobcode_id = scope
+    clause = "account = ? AND date BETWEEN ? AND ?"
+    params = [start_date, end_date]
+    if user_id != "all":
+        clause += " AND user_id = ?"
+        params.append(int(user_id))
+    if jobcode_id != "all":
+        clause += " AND jobcode_id = ?"
+        params.append(int(jobcode_id))
+    return clause, params
+
+
+def _row(account, entry):
+    return (
+        account,
+        int(entry['id']),
+        entry.get('date', ''),
+        entry.get('user_id'),
+        entry.get('jobcode_id'),
+        json.dumps(entry, separators=(',', ':'))
+    )
+
+
+class TimesheetStore:
+    """Thread-safe wrapper around one SQLite connection"""
+
+    def __init__(self, path=STORE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def load(self, account, scope):
+        """Return the stored timesheets of a filter scope"""
+        clause, params = _scope_filter(scope)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT payload FROM timesheets WHERE {clause}", [account, *params]
+            ).fetchall()
+        return [json.loads(payload) for payload, in rows]
+
+    def replace_scope(self, account, scope, entries):
+        """Store a full load of a scope, dropping rows of the scope that are gone"""
+        clause, params = _scope_filter(scope)
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM timesheets WHERE {clause}", [account, *params])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO timesheets VALUES (?, ?, ?, ?, ?, ?)",
+                [_row(account, entry) for entry in entries]
+            )
+
+    def apply_changes(self, account, changed, deleted_ids):
+        """Upsert changed timesheets and remove deleted ones"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO timesheets VALUES (?, ?, ?, ?, ?, ?)",
+                [_row(account, entry) for entry in changed]
+            )
+            self._conn.executemany(
+                "DELETE FROM timesheets WHERE account = ? AND id = ?",
+                [(account, int(entry_id)) for entry_id in deleted_ids]
+            )
+
+    def get_synced_at(self, account, scope):
+        """Return the last sync timestamp stored for a scope, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at FROM sync_state WHERE account = ? AND scope = ?",
+                (account, json.dumps(scope))
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_synced_at(self, account, scope, synced_at):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+                (account, json.dumps(scope), synced_at)
+            )
+
+    def load_reference(self, account, kind):
+        """Return a stored users/jobcodes dict, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM reference_data WHERE account = ? AND kind = ?",
+                (account, kind)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_reference(self, account, kind, records):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reference_data VALUES (?, ?, ?)",
+                (account, kind, json.dumps(records, separators=(',', ':')))
+            )
+
+
+def get_store():
+    """Return the process-wide timesheet store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TimesheetStore()
+    return _store
@@ -0,0 +1,52 @@
+"""Incremental timesheet sync built on the TSheets ``modified_since`` filter.
+
+A filter scope is the (date range, user, job code) selection the sidebar
+loads. Once a scope has been fully loaded, later refreshes only ask the API
+for records modified or deleted since the scope was last synced and merge
+them into the loaded set by id.
+"""
+from datetime import datetime, timedelta, timezone
+
+# Re-request a little history on every delta to absorb clock skew between
+# this host and TSheets; merging is idempotent so the overlap is harmless
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+def sync_scope(date_range, user_id="all", jobcode_id="all"):
+    """Return a hashable key for a filter scope"""
+    start_date, end_date = date_range
+    return (start_date.isoformat(), end_date.isoformat(), str(user_id), str(jobcode_id))
+
+
+def sync_timestamp():
+    """Return the ``modified_since`` value to store for a sync starting now"""
+    return (datetime.now(timezone.utc) - SYNC_OVERLAP).isoformat(timespec='seconds')
+
+
+def in_scope(entry, scope):
+    """Check whether a timesheet belongs to a filter scope"""
+    start_date, end_date, user_id, jobcode_id = scope
+    if not start_date <= entry.get('date', '') <= end_date:
+        return False
+    if user_id != "all" and str(entry.get('user_id')) != user_id:
+        return False
+    if jobcode_id != "all" and str(entry.get('jobcode_id')) != jobcode_id:
+        return False
+    return True
+
+
+def split_changes(changed, deleted_ids, scope):
+    """Sort a delta into records to upsert into a scope and ids to remove from it.
+
+    Changed records outside the scope count as removals, since an edit may
+    have moved them out of the loaded date range or filters.
+    """
+    upserted = []
+    removed_ids = {str(entry_id) for entry_id in deleted_ids}
+    for entry_id, entry in changed.items():
+        if in_scope(entry, scope):
+            upserted.append(entry)
+        else:
+            removed_ids.add(str(entry_id))
+    return upserted, removed_ids
+
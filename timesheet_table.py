@@ -0,0 +1,294 @@
+"""Compact columnar storage for the timesheets of a dataset snapshot.
+
+A list of TSheets JSON dicts costs well over a kilobyte per entry, most of
+it in fields no view reads. ``TimesheetTable`` keeps a projection of those
+fields as a struct of arrays instead: NumPy arrays for ids, durations,
+dates and start/end times, and dictionary codes for user, job code, type,
+notes and any extra fields, so a repeated note or custom field set is
+stored once. Fields outside the projection are dropped on load.
+
+The table stands in for the list of dicts: iterating it or looking an entry
+up by id returns plain dicts of the projected fields, and ``columns``
+hands the frame builder whole decoded columns without building any dict.
+Tables are never modified; ``merge`` returns a new table that shares the
+dictionaries of the one it was merged into.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+from timesheet_sync import split_changes
+
+# Fields every view reads, stored in typed columns
+CORE_FIELDS = ('id', 'user_id', 'jobcode_id', 'date', 'duration', 'type', 'notes', 'start', 'end')
+# Further TSheets fields to keep, dictionary-encoded; every other field is dropped
+EXTRA_FIELDS = tuple(
+    field.strip() for field in os.environ.get("TSHEETS_TIMESHEET_FIELDS", "customfields").split(",") if field.strip()
+)
+
+# Encodes a UTC offset in minutes alongside the seconds of a local time
+OFFSET_SPAN = 2048
+
+
+class Dictionary:
+    """Append-only value <-> code mapping, shared by a table and every table merged from it"""
+
+    def __init__(self, key=None):
+        self.values = []
+        self._codes = {}
+        self._key = key
+        self._decoded = None
+        self._lock = threading.Lock()
+
+    def encode(self, values):
+        """Return the int32 codes of ``values``, adding the values not seen yet"""
+        keys = values if self._key is None else [self._key(value) for value in values]
+        with self._lock:
+            known = self._codes
+            seen = len(known)
+            codes = [known.setdefault(key, len(known)) for key in keys]
+            if len(known) > seen:
+                # Values get the codes in the order their keys were first added
+                added = {}
+                for code, value in zip(codes, values):
+                    if code >= seen and code not in added:
+                        added[code] = value
+                self.values.extend(added[code] for code in range(seen, len(known)))
+        return np.array(codes, dtype=np.int32)
+
+    def decode(self, codes):
+        """Return the values of ``codes`` as an object array"""
+        decoded = self._decoded
+        if decoded is None or len(decoded) != len(self.values):
+            decoded = self._decoded = np.fromiter(self.values, dtype=object, count=len(self.values))
+        return decoded[codes]
+
+
+def _value_key(value):
+    """Hashable stand-in for a JSON value, so equal dicts and lists share a code"""
+    try:
+        if isinstance(value, dict):
+            return dict, frozenset(value.items())
+        hash(value)
+    except TypeError:
+        return json.dumps(value, sort_keys=True, default=str)
+    return type(value), value
+
+
+def _integers(values, dtype):
+    """``values`` as an integer array, with missing or malformed values as 0"""
+    try:
+        return np.array(values, dtype=dtype)
+    except (TypeError, ValueError):
+        return np.array([_integer(value) for value in values], dtype=dtype)
+
+
+def _integer(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _datetimes(values, unit):
+    """ISO date or time strings as ``datetime64[unit]``, with empty or malformed values as NaT"""
+    try:
+        return np.array(values, dtype=f'datetime64[{unit}]')
+    except ValueError:
+        return np.array([_datetime(value, unit) for value in values], dtype=f'datetime64[{unit}]')
+
+
+def _datetime(value, unit):
+    try:
+        return np.datetime64(value, unit)
+    except ValueError:
+        return np.datetime64('NaT')
+
+
+_offsets = {}
+
+
+def _offset_minutes(suffix):
+    """Minutes east of UTC of an ISO time suffix such as ``-06:00`` or ``Z``"""
+    minutes = _offsets.get(suffix)
+    if minutes is None:
+        minutes = 0
+        if len(suffix) >= 6 and suffix[0] in '+-' and suffix[1:3].isdigit() and suffix[4:6].isdigit():
+            minutes = int(suffix[1:3]) * 60 + int(suffix[4:6])
+            minutes = -minutes if suffix[0] == '-' else minutes
+        _offsets[suffix] = minutes
+    return minutes
+
+
+def _offset_suffix(minutes):
+    sign = '-' if minutes < 0 else '+'
+    hours, minutes = divmod(abs(int(minutes)), 60)
+    return f"{sign}{hours:02d}:{minutes:02d}"
+
+
+def _format_times(local, offsets):
+    """ISO strings of local times with their UTC offsets, formatting each distinct pair once"""
+    missing = np.isnat(local)
+    keys = np.where(missing, 0, local.astype(np.int64)) * OFFSET_SPAN + (offsets + OFFSET_SPAN // 2)
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    moments = (unique_keys // OFFSET_SPAN).astype('datetime64[s]')
+    offset_values, offset_inverse = np.unique(unique_keys % OFFSET_SPAN - OFFSET_SPAN // 2, return_inverse=True)
+    suffixes = np.array([_offset_suffix(minutes) for minutes in offset_values], dtype=str)[offset_inverse]
+    formatted = np.char.add(np.datetime_as_string(moments, unit='s'), suffixes).astype(object)[inverse.reshape(-1)]
+    formatted[missing] = ''
+    return formatted
+
+
+class TimesheetTable:
+    """Struct-of-arrays timesheets holding ``CORE_FIELDS`` and the ``extra_fields`` projection"""
+
+    def __init__(self, arrays, dictionaries, extra_fields):
+        self._arrays = arrays
+        self._dictionaries = dictionaries
+        self.extra_fields = extra_fields
+        self._lookup = None
+
+    @classmethod
+    def from_records(cls, records, extra_fields=EXTRA_FIELDS, dictionaries=None):
+        """Build a table from TSheets timesheet dicts, keeping only the projected fields.
+
+        Given the ``dictionaries`` of another table, codes are shared with it.
+        """
+        if dictionaries is None:
+            dictionaries = {'user_id': Dictionary(), 'jobcode_id': Dictionary(), 'type': Dictionary(),
+                            'notes': Dictionary()}
+            dictionaries.update({field: Dictionary(_value_key) for field in extra_fields})
+        records = records if isinstance(records, list) else list(records)
+        fields = {
+            field: [record.get(field) for record in records] for field in (*CORE_FIELDS, *extra_fields)
+        }
+
+        starts = [str(value or '') for value in fields['start']]
+        ends = [str(value or '') for value in fields['end']]
+        arrays = {
+            'id': _integers(fields['id'], np.int64),
+            'user_id': dictionaries['user_id'].encode(_integers(fields['user_id'], np.int64).tolist()),
+            'jobcode_id': dictionaries['jobcode_id'].encode(_integers(fields['jobcode_id'], np.int64).tolist()),
+            'date': _datetimes([str(value or '')[:10] for value in fields['date']], 'D'),
+            'duration': _integers(fields['duration'], np.int32),
+            'type': dictionaries['type'].encode([str(value or '') for value in fields['type']]),
+            'notes': dictionaries['notes'].encode([str(value or '') for value in fields['notes']]),
+            'start': _datetimes([value[:19] for value in starts], 's'),
+            'start_offset': np.array([_offset_minutes(value[19:]) for value in starts], dtype=np.int16),
+            'end': _datetimes([value[:19] for value in ends], 's'),
+            'end_offset': np.array([_offset_minutes(value[19:]) for value in ends], dtype=np.int16),
+        }
+        for field in extra_fields:
+            arrays[field] = dictionaries[field].encode(fields[field])
+        return cls(arrays, dictionaries, extra_fields)
+
+    def __len__(self):
+        return len(self._arrays['id'])
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns, not counting the dictionaries they share"""
+        return sum(array.nbytes for array in self._arrays.values())
+
+    def column(self, field):
+        """The decoded values of one projected field as an array"""
+        array = self._arrays[field]
+        if field in ('user_id', 'jobcode_id'):
+            return np.array(self._dictionaries[field].values, dtype=np.int64)[array]
+        if field in self._dictionaries:
+            return self._dictionaries[field].decode(array)
+        if field == 'date':
+            return np.where(np.isnat(array), '', np.datetime_as_string(array, unit='D')).astype(object)
+        if field in ('start', 'end'):
+            return _format_times(array, self._arrays[f'{field}_offset'])
+        return array
+
+    def columns(self, fields=None):
+        """``{field: column}`` for the given fields, all projected fields by default"""
+        return {field: self.column(field) for field in (fields or (*CORE_FIELDS, *self.extra_fields))}
+
+    def records(self, fields=None):
+        """Yield each entry as a dict of the given fields; extra fields the entry lacked are left out"""
+        columns = self.columns(fields)
+        names = list(columns)
+        extras = [field for field in names if field in self.extra_fields]
+        for values in zip(*(columns[name].tolist() for name in names)):
+            record = dict(zip(names, values))
+            for field in extras:
+                if record[field] is None:
+                    del record[field]
+            yield record
+
+    def __iter__(self):
+        return self.records()
+
+    def row(self, position):
+        """The entry at ``position`` as a dict"""
+        arrays, dictionaries = self._arrays, self._dictionaries
+        record = {}
+        for field in (*CORE_FIELDS, *self.extra_fields):
+            value = arrays[field][position]
+            if field in dictionaries:
+                value = dictionaries[field].values[value]
+            elif field == 'date':
+                value = '' if np.isnat(value) else str(value)
+            elif field in ('start', 'end'):
+                value = '' if np.isnat(value) else (
+                    f"{np.datetime_as_string(value, unit='s')}{_offset_suffix(arrays[f'{field}_offset'][position])}"
+                )
+            else:
+                value = int(value)
+            if value is not None or field not in self.extra_fields:
+                record[field] = value
+        return record
+
+    def _positions(self, ids):
+        """Row positions of ``ids`` (an int64 array), -1 where the table has no such id"""
+        if self._lookup is None:
+            order = np.argsort(self._arrays['id'], kind='stable')
+            self._lookup = order, self._arrays['id'][order]
+        order, sorted_ids = self._lookup
+        if not len(sorted_ids):
+            return np.full(len(ids), -1)
+        found = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+        return np.where(sorted_ids[found] == ids, order[found], -1)
+
+    def _position(self, entry_id):
+        try:
+            entry_id = int(entry_id)
+        except (TypeError, ValueError):
+            return -1
+        return self._positions(np.array([entry_id], dtype=np.int64))[0]
+
+    def get(self, entry_id):
+        """Return the entry with the given id, or None"""
+        position = self._position(entry_id)
+        return None if position < 0 else self.row(position)
+
+    def __contains__(self, entry_id):
+        return self._position(entry_id) >= 0
+
+    def merge(self, changed, deleted_ids, scope):
+        """Return a new table with the in-scope changes of a delta upserted and the rest removed.
+
+        Updated entries keep their position; new ones are appended.
+        """
+        upserted, removed_ids = split_changes(changed, deleted_ids, scope)
+        if not upserted and not removed_ids:
+            return self
+        additions = TimesheetTable.from_records(upserted, self.extra_fields, self._dictionaries)
+        removed = np.array([_integer(entry_id) for entry_id in removed_ids], dtype=np.int64)
+        removed = self._positions(removed[~np.isin(removed, additions._arrays['id'])])
+        keep = np.ones(len(self), dtype=bool)
+        keep[removed[removed >= 0]] = False
+
+        targets = self._positions(additions._arrays['id'])
+        updated = targets >= 0
+        arrays = {}
+        for field, array in self._arrays.items():
+            array = array.copy()
+            array[targets[updated]] = additions._arrays[field][updated]
+            arrays[field] = np.concatenate([array[keep], additions._arrays[field][~updated]])
+        return TimesheetTable(arrays, self._dictionaries, self.extra_fields)
@@ -0,0 +1,246 @@
+"""TSheets REST API endpoints, limits and response helpers.
+
+The rate limiter, retry policy and error type here are used by the httpx
+client in ``tsheets_async``, the only code that talks to TSheets. Nothing
+in this module makes a request or calls Streamlit, so it can be used from
+any thread.
+"""
+import hashlib
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+from instrumentation import telemetry
+
+# --- API Configuration ---
+BASE_URL = "https://rest.tsheets.com/api/v1"
+TIMESHEETS_ENDPOINT = f"{BASE_URL}/timesheets"
+TIMESHEETS_DELETED_ENDPOINT = f"{BASE_URL}/timesheets_deleted"
+JOBS_ENDPOINT = f"{BASE_URL}/jobcodes"
+USERS_ENDPOINT = f"{BASE_URL}/users"
+REPORTS_ENDPOINT = f"{BASE_URL}/reports"
+CURRENT_USER_ENDPOINT = f"{BASE_URL}/current_user"
+
+# TSheets caps list endpoints at 200 records per page
+PAGE_LIMIT = 200
+MAX_WORKERS = 8
+
+# TSheets accepts at most 50 timesheets per create, update or delete request
+MUTATION_BATCH_SIZE = 50
+
+# Connections kept open per host; should be at least MAX_WORKERS
+POOL_SIZE = 16
+
+# TSheets allows 300 requests per 5 minute window per access token
+RATE_LIMIT_REQUESTS = 300
+RATE_LIMIT_PERIOD = 300
+
+# Retry policy: 429 is retried for every method since the server did not
+# act on the request; 5xx and connection errors only for idempotent ones
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+# A Retry-After longer than this fails the request instead of waiting it out
+RETRY_AFTER_MAX = RATE_LIMIT_PERIOD
+REQUEST_TIMEOUT = 30
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class TSheetsAPIError(Exception):
+    """Raised when a TSheets request fails"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class SlidingWindowLimiter:
+    """Thread-safe log of the requests made with one token during the last ``period`` seconds.
+
+    A request goes out only while fewer than ``limit`` were sent in the
+    window, so a sync can use the whole quota at once and still never
+    send more than ``limit`` in any ``period``.
+    """
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self._sent = deque()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Record one request if allowed now and return None; otherwise return the seconds to wait before retrying"""
+        with self._lock:
+            now = time.monotonic()
+            while self._sent and self._sent[0] <= now - self.period:
+                self._sent.popleft()
+            if now >= self._blocked_until and len(self._sent) < self.limit:
+                self._sent.append(now)
+                return None
+            delay = self._blocked_until - now
+            if len(self._sent) >= self.limit:
+                delay = max(delay, self._sent[0] + self.period - now)
+            return max(delay, 0.0)
+
+    def pause(self, seconds):
+        """Hold back every caller for ``seconds``, e.g. after the server answered 429"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class ClientMetrics:
+    """Counters for requests, retries and time spent waiting on the rate limit"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.retries = 0
+            self.rate_limited = 0
+            self.throttled_seconds = 0.0
+
+    def record(self, requests=0, retries=0, rate_limited=0, throttled_seconds=0.0):
+        with self._lock:
+            self.requests += requests
+            self.retries += retries
+            self.rate_limited += rate_limited
+            self.throttled_seconds += throttled_seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "throttled_seconds": round(self.throttled_seconds, 3)
+            }
+
+
+metrics = ClientMetrics()
+telemetry.register_collector(
+    "api_client", lambda: {f"api_client_{name}": value for name, value in metrics.snapshot().items()}
+)
+
+
+def endpoint_name(url):
+    """Return the endpoint part of an API URL (``timesheets``, ``users``...) for metric labels"""
+    return url.split('?')[0].rstrip('/').rsplit('/', 1)[-1]
+
+
+def record_api_call(endpoint, method, status, seconds, size=0):
+    """Record one HTTP attempt: latency by endpoint, method and status, plus response bytes"""
+    telemetry.observe("api_request", seconds, endpoint=endpoint, method=method, status=status)
+    if size:
+        telemetry.count("api_response_bytes", size, endpoint=endpoint)
+
+
+def token_hash(token):
+    """Return a stable digest of an access token for use as a cache key"""
+    return hashlib.sha256(str(token).encode()).hexdigest()
+
+
+def account_key(token, account_id=None):
+    """Return the key under which data visible to a token on an account is cached"""
+    return f"{account_id}:{token_hash(token)}"
+
+
+def get_rate_limiter(token):
+    """Return the process-wide rate limiter for an access token"""
+    key = token_hash(token)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = SlidingWindowLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_PERIOD)
+            _limiters[key] = limiter
+        return limiter
+
+
+def retry_delay(attempt, response=None):
+    """Seconds to wait before retry ``attempt``: Retry-After as given, else full-jitter backoff"""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def error_message(error_data, default):
+    """Return the ``error.message`` of a TSheets error body, or ``default``"""
+    if isinstance(error_data, dict) and isinstance(error_data.get('error'), dict):
+        return error_data['error'].get('message', default)
+    return default
+
+
+def page_items(body, result_key):
+    """Return the ``results[result_key]`` records of a list response as a dict keyed by id"""
+    items = (body or {}).get('results', {}).get(result_key) or {}
+    # PHP encodes an empty object as ``[]``, and some endpoints return lists
+    if isinstance(items, list):
+        return {str(item['id']): item for item in items}
+    return {str(item_id): item for item_id, item in items.items()}
+
+
+def last_page(body, result_key, limit):
+    """True if a list response is the last page: ``more`` unset or fewer than ``limit`` records"""
+    return not (body or {}).get('more') or len((body or {}).get('results', {}).get(result_key) or ()) < limit
+
+
+def split_date_range(start_date, end_date, days=7):
+    """Split an inclusive date range into consecutive windows of at most ``days`` days"""
+    windows = []
+    cursor = start_date
+    while cursor <= end_date:
+        window_end = min(cursor + timedelta(days=days - 1), end_date)
+        windows.append((cursor, window_end))
+        cursor = window_end + timedelta(days=1)
+    return windows
+
+
+def chunked(items, size):
+    """Split a list into consecutive chunks of at most ``size`` items"""
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def mutation_results(body, chunk, method):
+    """Pair each item of a mutation chunk with its ``(record, error)`` outcome.
+
+    Results are keyed by the 1-based position of the item for creates and
+    updates and by id for deletes; each carries a ``_status_code`` and
+    ``_status_message`` that are stripped from successful records.
+    """
+    results = (body or {}).get('results', {}).get('timesheets') or {}
+    if isinstance(results, list):
+        results = {str(position): result for position, result in enumerate(results, 1)}
+    outcomes = []
+    for position, item in enumerate(chunk, 1):
+        key = str(item['id']) if method == "DELETE" else str(position)
+        result = results.get(key)
+        if result is None:
+            outcomes.append((item, None, TSheetsAPIError("No result returned for this entry")))
+            continue
+        status_code = int(result.get('_status_code', 200))
+        if status_code >= 400:
+            message = result.get('_status_extra') or result.get('_status_message') or "Request failed"
+            outcomes.append((item, None, TSheetsAPIError(message, status_code)))
+            continue
+        record = {k: v for k, v in result.items() if not k.startswith('_status')}
+        outcomes.append((item, record, None))
+    return outcomes
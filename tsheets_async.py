@@ -0,0 +1,346 @@
+"""asyncio TSheets client built on httpx.
+
+``AsyncTSheetsClient`` is the only code that talks to TSheets. It applies
+the per-token rate limiter, retry policy and ``TSheetsAPIError`` semantics
+defined in ``tsheets_api`` and waits on the event loop instead of parking
+a thread per request. Independent requests are fanned out with
+``asyncio.gather`` and paginated pulls are bounded by a semaphore on the
+requests in flight.
+
+Every client sends through one process-wide ``httpx.AsyncClient`` owned by
+an event loop on its own daemon thread, so its keep-alive connections are
+reused by every request and sync. ``run`` is the synchronous facade for
+the Streamlit script and worker threads: it submits a coroutine to that
+loop and waits for the result. ``request``, ``fetch_reference_data`` and
+``bulk_mutate_timesheets`` are blocking wrappers built on it.
+"""
+import asyncio
+import queue
+import threading
+import time
+
+import httpx
+
+from tsheets_api import (
+    TIMESHEETS_ENDPOINT,
+    TIMESHEETS_DELETED_ENDPOINT,
+    JOBS_ENDPOINT,
+    USERS_ENDPOINT,
+    PAGE_LIMIT,
+    MAX_WORKERS,
+    MUTATION_BATCH_SIZE,
+    POOL_SIZE,
+    MAX_RETRIES,
+    REQUEST_TIMEOUT,
+    RETRY_STATUS_CODES,
+    RETRY_AFTER_MAX,
+    IDEMPOTENT_METHODS,
+    TSheetsAPIError,
+    chunked,
+    endpoint_name,
+    error_message,
+    get_rate_limiter,
+    last_page,
+    metrics,
+    mutation_results,
+    page_items,
+    record_api_call,
+    retry_delay,
+    split_date_range,
+)
+from instrumentation import telemetry
+
+_loop = None
+_http = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Return the process-wide event loop, started on a daemon thread on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="tsheets-async", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def get_http_client():
+    """Return the httpx client shared by every request; only use it on the loop of ``get_loop``"""
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(
+            headers={"Accept-Encoding": "gzip", "Content-Type": "application/json"},
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+        )
+    return _http
+
+
+def submit(coroutine):
+    """Schedule a coroutine on the shared event loop and return a ``concurrent.futures.Future`` of its result"""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_loop())
+
+
+def run(coroutine):
+    """Run a coroutine on the shared event loop from synchronous code and return its result"""
+    return submit(coroutine).result()
+
+
+class AsyncTSheetsClient:
+    """Requests made with one token over the shared httpx client, at most ``max_concurrency`` at a time.
+
+    Create and use it inside coroutines passed to ``run``.
+    """
+
+    def __init__(self, token, max_concurrency=MAX_WORKERS):
+        self.token = token
+        self.max_concurrency = max_concurrency
+        self._limiter = get_rate_limiter(token)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Auth is per request; the shared client carries no credentials
+        self._headers = {"Authorization": f"Bearer {token}"}
+
+    async def _acquire(self):
+        """Wait for the rate limiter without blocking the event loop. Returns seconds waited"""
+        waited = 0.0
+        while (delay := self._limiter.try_acquire()) is not None:
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+    async def request(self, method, url, params=None, data=None):
+        """Send a request and return the decoded JSON body.
+
+        Every attempt is counted against the per-token rate limiter.
+        Throttled (429) responses pause the limiter for all callers and are
+        retried; 5xx responses and transport errors are retried for
+        idempotent methods. A Retry-After beyond ``RETRY_AFTER_MAX`` fails
+        the request right away, while the limiter still holds back later
+        ones.
+        """
+        endpoint = endpoint_name(url)
+        method = method.upper()
+        retryable = method in IDEMPOTENT_METHODS
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                # Take a slot before the rate limit so a cancelled caller never spends quota
+                async with self._semaphore:
+                    metrics.record(requests=1, throttled_seconds=await self._acquire())
+                    started = time.perf_counter()
+                    response = await get_http_client().request(
+                        method, url, headers=self._headers, params=params, json=data
+                    )
+            except httpx.RequestError as e:
+                record_api_call(endpoint, method, "error", time.perf_counter() - started)
+                if not (retryable and isinstance(e, httpx.TransportError)) or attempt == MAX_RETRIES:
+                    raise TSheetsAPIError(str(e)) from e
+                delay = retry_delay(attempt)
+                metrics.record(retries=1, throttled_seconds=delay)
+                telemetry.count("api_retries", endpoint=endpoint)
+                await asyncio.sleep(delay)
+                continue
+
+            status_code = response.status_code
+            record_api_call(endpoint, method, status_code, time.perf_counter() - started, len(response.content))
+            if status_code in RETRY_STATUS_CODES and attempt < MAX_RETRIES and (status_code == 429 or retryable):
+                delay = retry_delay(attempt, response)
+                if status_code == 429:
+                    self._limiter.pause(delay)
+                if delay > RETRY_AFTER_MAX:
+                    break
+                telemetry.count("api_retries", endpoint=endpoint)
+                if status_code == 429:
+                    metrics.record(retries=1, rate_limited=1)
+                else:
+                    metrics.record(retries=1, throttled_seconds=delay)
+                    await asyncio.sleep(delay)
+                continue
+            break
+
+        try:
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPStatusError, ValueError) as e:
+            try:
+                error_data = response.json()
+            except ValueError:
+                error_data = None
+            raise TSheetsAPIError(error_message(error_data, str(e)), status_code) from e
+
+    async def fetch_all_pages(self, url, result_key, params=None, limit=PAGE_LIMIT, on_page=None):
+        """Fetch every page of a list endpoint and merge the records by id.
+
+        The first page is read on its own; if the API reports ``more`` the
+        following pages are requested concurrently in waves. TSheets does
+        not report a total page count, so the first wave is one page and a
+        wave is only twice as wide as the last, up to ``max_concurrency``,
+        once every page of the last came back full. As soon as a page comes
+        back as the last, the pages after it that have not been sent yet
+        are cancelled. ``on_page`` is called with the number of records in
+        each page as it arrives.
+        """
+        params = dict(params or {}, limit=limit)
+
+        async def get_page(page):
+            body = await self.request("GET", url, params=dict(params, page=page))
+            if on_page is not None:
+                on_page(len((body or {}).get('results', {}).get(result_key) or ()))
+            return body
+
+        first = await get_page(1)
+        merged = page_items(first, result_key)
+        if last_page(first, result_key, limit):
+            return merged
+
+        next_page, width, end = 2, 1, None
+        while end is None:
+            in_flight = {
+                asyncio.ensure_future(get_page(page)): page
+                for page in range(next_page, next_page + width)
+            }
+            next_page += width
+            try:
+                while in_flight:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        page = in_flight.pop(task)
+                        body = task.result()
+                        merged.update(page_items(body, result_key))
+                        if last_page(body, result_key, limit):
+                            end = page if end is None else min(end, page)
+                    if end is not None:
+                        for task, page in list(in_flight.items()):
+                            if page > end:
+                                task.cancel()
+                                del in_flight[task]
+            finally:
+                for task in in_flight:
+                    task.cancel()
+            width = min(self.max_concurrency, width * 2)
+        return merged
+
+    async def fetch_timesheets(self, start_date, end_date, params=None, window_days=None, on_page=None):
+        """Fetch all timesheets between two dates as a list, windows concurrently"""
+        params = dict(params or {})
+        if window_days:
+            windows = split_date_range(start_date, end_date, window_days)
+        else:
+            windows = [(start_date, end_date)]
+        results = await asyncio.gather(*(
+            self.fetch_all_pages(
+                TIMESHEETS_ENDPOINT, 'timesheets',
+                params=dict(params, start_date=window_start.isoformat(), end_date=window_end.isoformat()),
+                on_page=on_page
+            )
+            for window_start, window_end in windows
+        ))
+        merged = {}
+        for records in results:
+            merged.update(records)
+        return list(merged.values())
+
+    async def fetch_timesheet_changes(self, modified_since, on_page=None):
+        """Fetch ``(changed, deleted_ids)`` since an ISO 8601 timestamp, both lists concurrently"""
+        params = {"modified_since": modified_since}
+        changed, deleted = await asyncio.gather(
+            self.fetch_all_pages(TIMESHEETS_ENDPOINT, 'timesheets', params=params, on_page=on_page),
+            self.fetch_all_pages(TIMESHEETS_DELETED_ENDPOINT, 'timesheets_deleted', params=params, on_page=on_page)
+        )
+        return changed, set(deleted)
+
+
+    async def fetch_reference_data(self, modified_since=None):
+        """Fetch users and jobcodes concurrently as ``(users, jobcodes)`` dicts keyed by id.
+
+        A full load asks for active records only. With ``modified_since``
+        the inactive ones are included too, so callers can drop deactivated
+        records.
+        """
+        if modified_since:
+            params = {"active": "both", "modified_since": modified_since}
+        else:
+            params = {"active": "yes"}
+        return tuple(await asyncio.gather(
+            self.fetch_all_pages(USERS_ENDPOINT, 'users', params=params),
+            self.fetch_all_pages(JOBS_ENDPOINT, 'jobcodes', params=params)
+        ))
+
+    async def bulk_mutate(self, method, items, batch_size=MUTATION_BATCH_SIZE, on_chunk=None):
+        """Create (POST), update (PUT) or delete (DELETE) timesheets in concurrent batches.
+
+        ``items`` are timesheet dicts; for deletes only their ``id`` is
+        used. Items are sent ``batch_size`` at a time and every chunk is
+        checked per item, so one rejected entry does not fail the rest.
+        Returns ``(succeeded, failed)``: ``succeeded`` is a list of
+        ``(item, record)`` pairs with the record the API returned and
+        ``failed`` a list of ``(item, TSheetsAPIError)`` pairs.
+        ``on_chunk`` is called with the number of items in each chunk as it
+        completes.
+        """
+        method = method.upper()
+
+        async def send_chunk(chunk):
+            try:
+                if method == "DELETE":
+                    ids = ",".join(str(item['id']) for item in chunk)
+                    body = await self.request(method, TIMESHEETS_ENDPOINT, params={"ids": ids})
+                else:
+                    body = await self.request(method, TIMESHEETS_ENDPOINT, data={"data": chunk})
+            except TSheetsAPIError as e:
+                outcomes = [(item, None, e) for item in chunk]
+            else:
+                outcomes = mutation_results(body, chunk, method)
+            if on_chunk is not None:
+                on_chunk(len(outcomes))
+            return outcomes
+
+        succeeded, failed = [], []
+        chunks = await asyncio.gather(*(send_chunk(chunk) for chunk in chunked(list(items), batch_size)))
+        for outcomes in chunks:
+            for item, record, error in outcomes:
+                if error is None:
+                    succeeded.append((item, record))
+                else:
+                    failed.append((item, error))
+        return succeeded, failed
+
+
+def request(token, method, url, params=None, data=None):
+    """Blocking facade over ``AsyncTSheetsClient.request``"""
+    async def send():
+        return await AsyncTSheetsClient(token).request(method, url, params=params, data=data)
+    return run(send())
+
+
+def fetch_reference_data(token, modified_since=None):
+    """Blocking facade over ``AsyncTSheetsClient.fetch_reference_data``"""
+    async def fetch():
+        return await AsyncTSheetsClient(token).fetch_reference_data(modified_since)
+    return run(fetch())
+
+
+def bulk_mutate_timesheets(token, method, items, batch_size=MUTATION_BATCH_SIZE, progress=None):
+    """Blocking facade over ``AsyncTSheetsClient.bulk_mutate``.
+
+    ``progress`` is called on the calling thread as ``progress(done, total)``
+    after each chunk completes.
+    """
+    items = list(items)
+    completed = queue.SimpleQueue()
+
+    async def mutate():
+        try:
+            return await AsyncTSheetsClient(token).bulk_mutate(method, items, batch_size, on_chunk=completed.put)
+        finally:
+            completed.put(None)
+
+    future = submit(mutate())
+    done = 0
+    for count in iter(completed.get, None):
+        done += count
+        if progress is not None:
+            progress(done, len(items))
+    return future.result()
@@ -0,0 +1,141 @@
+"""Add Entry view: the new entry form and the bulk CSV/Excel import."""
+from datetime import datetime, timedelta, date
+
+import streamlit as st
+
+from app_state import get_reference_options, create_timesheet, mutate_timesheets
+
+
+def render():
+    """Show the new entry form and the bulk import"""
+    st.markdown('<div class="main-header">➕ Add New Timesheet Entry</div>', unsafe_allow_html=True)
+   
+    with st.form("add_entry_form", clear_on_submit=True):
+        st.markdown('<div class="form-section">', unsafe_allow_html=True)
+       
+        # User and Job Code selection
+        col1, col2 = st.columns(2)
+        reference_options = get_reference_options()
+        with col1:
+            user_options = reference_options.user_labels
+            user_id = st.selectbox(
+                "User",
+                options=list(user_options.keys()),
+                format_func=lambda x: user_options[x]
+            )
+       
+        with col2:
+            job_options = reference_options.jobcode_labels
+            jobcode_id = st.selectbox(
+                "Job Code",
+                options=list(job_options.keys()),
+                format_func=lambda x: job_options[x]
+            )
+       
+        # Date and Time
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            entry_date = st.date_input("Entry Date", value=date.today())
+       
+        with col2:
+            start_time = st.time_input("Start Time", value=datetime.now().time().replace(minute=0, second=0, microsecond=0))
+       
+        with col3:
+            # Default to 1 hour after start time
+            default_end = datetime.combine(date.today(), start_time) + timedelta(hours=1)
+            end_time = st.time_input("End Time", value=default_end.time())
+       
+        # Entry type and notes
+        col1, col2 = st.columns(2)
+        with col1:
+            entry_type = st.selectbox("Entry Type", ["regular", "manual"])
+       
+        with col2:
+            notes = st.text_area("Notes", placeholder="Enter any notes about this timesheet entry...")
+       
+        # Custom fields
+        st.markdown("### Custom Fields")
+        custom_col1, custom_col2 = st.columns(2)
+        with custom_col1:
+            custom1 = st.text_input("Custom Field 1", placeholder="Project code, reference number, etc.")
+       
+        with custom_col2:
+            custom2 = st.text_input("Custom Field 2", placeholder="Additional information")
+       
+        st.markdown('</div>', unsafe_allow_html=True)
+       
+        # Validation before submission
+        start_dt = datetime.combine(entry_date, start_time)
+        end_dt = datetime.combine(entry_date, end_time)
+       
+        if end_dt <= start_dt:
+            st.warning("End time must be after start time.")
+       
+        # Submit button
+        submit_col1, submit_col2 = st.columns([3, 1])
+        with submit_col2:
+            submit_button = st.form_submit_button("Submit Entry", use_container_width=True)
+       
+        if submit_button:
+            if end_dt <= start_dt:
+                st.error("❌ End time must be after start time.")
+            else:
+                new_entry = {
+                    "user_id": int(user_id),
+                    "jobcode_id": int(jobcode_id),
+                    "type": entry_type,
+                    "start": start_dt.isoformat(),
+                    "end": end_dt.isoformat(),
+                    "date": entry_date.isoformat(),
+                    "notes": notes,
+                    "customfields": {
+                        "19142": custom1,
+                        "19144": custom2
+                    }
+                }
+               
+                create_timesheet(new_entry)
+                st.success("✅ Entry created. Syncing with TSheets in the background.")
+   
+    # Bulk import
+    with st.expander("📥 Bulk Import from CSV or Excel"):
+        st.markdown(
+            "Columns: `user_id`, `jobcode_id`, `start`, `end` (ISO 8601 with UTC offset, "
+            "e.g. `2024-05-01T08:00:00-06:00`), and optionally `date`, `type` and `notes`. "
+            "Times without an offset are rejected rather than guessed."
+        )
+        import_file = st.file_uploader("Import File", type=["csv", "xlsx"], key="import_file")
+       
+        if import_file is not None and st.button("Validate and Import", use_container_width=True):
+            # The import and report writers need pandas; load them only when a file is imported
+            from timesheet_import import read_import, validate_import, import_entries, error_report
+            from view_common import download_csv
+           
+            try:
+                with st.spinner("Validating rows..."):
+                    valid, rejected = validate_import(
+                        read_import(import_file, import_file.name),
+                        st.session_state.users,
+                        st.session_state.jobcodes,
+                        st.session_state.timesheets
+                    )
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            else:
+                entries = import_entries(valid)
+                entry_lines = {id(entry): line for entry, line in zip(entries, valid['line'])}
+                failed = []
+                if entries:
+                    import_progress = st.progress(0.0, text="Uploading entries...")
+                    def report_progress(done, total):
+                        import_progress.progress(done / total, text=f"Uploaded {done} of {total} entries")
+                    succeeded, failed = mutate_timesheets(
+                        "POST", entries, progress=report_progress, show_errors=False
+                    )
+                    st.success(f"✅ Imported {len(succeeded)} of {len(entries) + len(rejected)} rows.")
+               
+                errors = error_report(rejected, failed, entry_lines)
+                if not errors.empty:
+                    st.warning(f"{len(errors)} rows were not imported.")
+                    st.dataframe(errors.head(100), use_container_width=True)
+                    download_csv(errors, "import_errors.csv", "📥 Download Error File")
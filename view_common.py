@@ -0,0 +1,143 @@
+"""Frame, report and chart helpers shared by the views.
+
+Importing this module loads pandas and the frame, cube and export
+modules, so only the view modules import it, and the app only imports a
+view the first time it is shown.
+"""
+import streamlit as st
+
+from app_state import get_id_index, artifact
+from timesheet_frame import build_timesheet_frame, patch_timesheet_frame
+from derived_cache import derived_cache, frame_fingerprint
+from timesheet_cube import build_cube, patch_cube
+from timesheet_grid import (
+    PAGE_SIZES,
+    DEFAULT_PAGE_SIZE,
+    GRID_COLUMNS,
+    SortOrders,
+    page_count,
+    page_rows,
+    display_rows,
+    entry_labels
+)
+from exports import csv_export
+from instrumentation import telemetry
+
+
+def _build_frame(snapshot):
+    with telemetry.timer("frame_build"):
+        frame = build_timesheet_frame(snapshot.timesheets, snapshot.users, snapshot.jobcodes)
+        return frame, frame_fingerprint(frame), None
+
+
+def _patch_frame(snapshot, base, upserted, removed_ids):
+    with telemetry.timer("frame_patch"):
+        patch = patch_timesheet_frame(base[0], upserted, removed_ids, snapshot.users, snapshot.jobcodes)
+        return patch.frame, frame_fingerprint(patch.frame), patch
+
+
+def _frame_artifact(snapshot):
+    """Return ``(frame, fingerprint, patch)`` of a snapshot; ``patch`` is the ``FramePatch`` it was made by, if any"""
+    return snapshot.artifact('timesheet_frame', _build_frame, _patch_frame)
+
+
+def _frame_cache():
+    """Return ``(frame, fingerprint, patch)`` for the current data, shared with sessions showing the same snapshot"""
+    return artifact('timesheet_frame', _build_frame, _patch_frame)
+
+
+def get_timesheet_frame():
+    """Return the normalized timesheet frame of the snapshot on screen"""
+    return _frame_cache()[0]
+
+
+def timed_aggregation(compute, data, *params):
+    """Run ``compute(data, *params)`` on a derived cache miss, timed per artifact"""
+    with telemetry.timer("aggregation", artifact=compute.__name__):
+        return compute(data, *params)
+
+
+def _build_cube(snapshot):
+    return timed_aggregation(build_cube, _frame_artifact(snapshot)[0])
+
+
+def _patch_cube(snapshot, cube, upserted, removed_ids):
+    patch = _frame_artifact(snapshot)[2]
+    if patch is None:
+        return None
+    return timed_aggregation(patch_cube, cube, patch.frame, patch.touched)
+
+
+def rolled_up(compute, *params):
+    """Return ``compute(cube, *params)`` for the day x user x job code cube, memoized on the frame's content and the params"""
+    cube = artifact('cube', _build_cube, _patch_cube)
+    fingerprint = _frame_cache()[1]
+    key = (fingerprint, compute.__name__, params)
+    return derived_cache.get_or_compute(key, lambda: timed_aggregation(compute, cube, *params))
+
+
+def _patch_sort_orders(snapshot, orders, upserted, removed_ids):
+    patch = _frame_artifact(snapshot)[2]
+    return orders.patched(patch) if patch is not None else None
+
+
+def get_sort_orders():
+    """Return the grid's presorted row permutations for the snapshot on screen"""
+    return artifact('sort_orders', lambda snapshot: SortOrders(_frame_artifact(snapshot)[0]), _patch_sort_orders)
+
+
+def timesheet_grid(frame, positions, key, columns=GRID_COLUMNS):
+    """Show one page of the frame rows at ``positions`` with paging controls and return that page's rows"""
+    size_col, page_col, info_col = st.columns([1, 1, 2])
+    with size_col:
+        page_size = st.selectbox(
+            "Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key=f"{key}_page_size"
+        )
+    pages = page_count(len(positions), page_size)
+    # A narrower search or larger page size can leave the remembered page out of range
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    with page_col:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+   
+    visible = page_rows(frame, positions, page, page_size)
+    first_row = (page - 1) * page_size
+    with info_col:
+        st.caption(f"Showing {first_row + 1 if len(visible) else 0}–{first_row + len(visible)} of {len(positions)} entries")
+    st.dataframe(display_rows(visible, columns), use_container_width=True)
+    return visible
+
+
+def pick_timesheet(visible, label, key):
+    """Pick an entry from the visible page, or any loaded entry by typing its ID"""
+    labels = entry_labels(visible)
+    selected_id = st.selectbox(label, list(labels.keys()), format_func=lambda x: labels[x], key=key)
+    typed_id = st.text_input("Or go to entry ID", key=f"{key}_typed").strip()
+    if typed_id:
+        if typed_id in get_id_index():
+            return int(typed_id)
+        st.warning(f"No loaded entry has ID {typed_id}.")
+    return selected_id
+
+
+def download_csv(df, filename, text, transform=None, positions=None):
+    """Show a download button that writes the dataframe as CSV only when clicked"""
+    st.download_button(
+        text,
+        data=csv_export(df, transform=transform, positions=positions),
+        file_name=filename,
+        mime="text/csv",
+        on_click="ignore"
+    )
+
+
+def build_chart(name, plot, *args, **kwargs):
+    """Build a Plotly Express figure with ``plot(*args, **kwargs)``, timed under ``name``"""
+    with telemetry.timer("chart_build", chart=name):
+        return plot(*args, **kwargs)
+
+
+def show_chart(fig, name):
+    """Serialize and send a figure to the browser, timed under ``name``"""
+    with telemetry.timer("chart_render", chart=name):
+        st.plotly_chart(fig, use_container_width=True)
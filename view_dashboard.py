@@ -0,0 +1,111 @@
+"""Dashboard view: summary metrics and hours charts for the loaded period."""
+import plotly.express as px
+import streamlit as st
+
+import timesheet_reports as reports
+from chart_data import top_n, downsample, line_render_mode
+from view_common import rolled_up, build_chart, show_chart
+
+
+def render():
+    """Show the dashboard"""
+    st.markdown('<div class="main-header">📊 TSheets Dashboard</div>', unsafe_allow_html=True)
+   
+    # Summary metrics
+    if st.session_state.timesheets:
+        # Calculate metrics
+        metrics = rolled_up(reports.summary_metrics)
+        total_hours = metrics['total_hours']
+        unique_users = metrics['unique_users']
+        unique_jobs = metrics['unique_jobs']
+        avg_daily_hours = metrics['avg_daily_hours']
+       
+        # Display metrics
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value">{total_hours:.1f}</div>
+                <div class="metric-label">Total Hours</div>
+            </div>
+            """, unsafe_allow_html=True)
+       
+        with col2:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value">{unique_users}</div>
+                <div class="metric-label">Active Users</div>
+            </div>
+            """, unsafe_allow_html=True)
+       
+        with col3:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value">{unique_jobs}</div>
+                <div class="metric-label">Active Job Codes</div>
+            </div>
+            """, unsafe_allow_html=True)
+       
+        with col4:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value">{avg_daily_hours:.1f}</div>
+                <div class="metric-label">Avg. Daily Hours</div>
+            </div>
+            """, unsafe_allow_html=True)
+       
+        # Charts
+        chart_col1, chart_col2 = st.columns(2)
+       
+        with chart_col1:
+            st.markdown('<div class="sub-header">Hours by User</div>', unsafe_allow_html=True)
+            user_hours = rolled_up(reports.hours_by_user)
+           
+            fig = build_chart(
+                "dashboard_hours_by_user", px.bar,
+                top_n(user_hours, 'user_name', 'hours'),
+                x='user_name',
+                y='hours',
+                color='hours',
+                color_continuous_scale='Blues',
+                labels={'user_name': 'User', 'hours': 'Hours'},
+                height=400
+            )
+            fig.update_layout(xaxis_tickangle=-45)
+            show_chart(fig, "dashboard_hours_by_user")
+       
+        with chart_col2:
+            st.markdown('<div class="sub-header">Hours by Job Code</div>', unsafe_allow_html=True)
+            job_hours = rolled_up(reports.hours_by_job)
+           
+            fig = build_chart(
+                "dashboard_hours_by_job", px.pie,
+                top_n(job_hours, 'jobcode_name', 'hours'),
+                values='hours',
+                names='jobcode_name',
+                hole=0.4,
+                color_discrete_sequence=px.colors.sequential.Blues_r,
+                height=400
+            )
+            fig.update_traces(textposition='inside', textinfo='percent+label')
+            show_chart(fig, "dashboard_hours_by_job")
+       
+        # Time trend chart
+        st.markdown('<div class="sub-header">Daily Hours Trend</div>', unsafe_allow_html=True)
+        daily_hours = downsample(rolled_up(reports.daily_hours), 'date', 'hours')
+       
+        fig = build_chart(
+            "dashboard_daily_trend", px.line,
+            daily_hours,
+            x='date',
+            y='hours',
+            markers=True,
+            render_mode=line_render_mode(daily_hours),
+            labels={'date': 'Date', 'hours': 'Hours'},
+            height=300
+        )
+        fig.update_layout(xaxis_title='Date', yaxis_title='Hours')
+        show_chart(fig, "dashboard_daily_trend")
+       
+    else:
+        st.info("No timesheet data available for the selected filters. Please adjust your filters or add new entries.")
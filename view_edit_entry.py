@@ -0,0 +1,133 @@
+"""Edit Entry view: pick an entry from the paged grid and edit it."""
+from datetime import datetime, timedelta, date
+
+import numpy as np
+import streamlit as st
+
+from app_state import get_search_index, get_reference_options, find_timesheet, update_timesheet
+from timesheet_grid import SELECTION_COLUMNS, filter_positions
+from view_common import get_timesheet_frame, timesheet_grid, pick_timesheet
+
+
+def render():
+    """Show the entry picker and the edit form"""
+    st.markdown('<div class="main-header">✏️ Edit Timesheet Entry</div>', unsafe_allow_html=True)
+   
+    if st.session_state.timesheets:
+        # Paged selection table, searchable through the same index as View Timesheets
+        frame = get_timesheet_frame()
+        edit_search = st.text_input("Search entries", placeholder="Enter user name, job code, or notes...")
+        matching_ids = get_search_index().search(edit_search) if edit_search else None
+        positions = filter_positions(frame, np.arange(len(frame)), matching_ids)
+        visible = timesheet_grid(frame, positions, "edit_grid", SELECTION_COLUMNS)
+       
+        # Select entry to edit
+        selected_id = pick_timesheet(visible, "Select Entry ID to Edit", "edit_entry")
+        if selected_id is None:
+            st.info("No entries match the search.")
+        else:
+            selected = find_timesheet(selected_id)
+           
+            with st.form("edit_entry_form"):
+                st.markdown('<div class="form-section">', unsafe_allow_html=True)
+               
+                # User and Job Code selection
+                col1, col2 = st.columns(2)
+                reference_options = get_reference_options()
+                with col1:
+                    user_options = reference_options.user_labels
+                    new_user_id = st.selectbox(
+                        "User",
+                        options=list(user_options.keys()),
+                        format_func=lambda x: user_options[x],
+                        index=reference_options.user_position(selected['user_id'])
+                    )
+               
+                with col2:
+                    job_options = reference_options.jobcode_labels
+                    new_jobcode_id = st.selectbox(
+                        "Job Code",
+                        options=list(job_options.keys()),
+                        format_func=lambda x: job_options[x],
+                        index=reference_options.jobcode_position(selected['jobcode_id'])
+                    )
+               
+                # Parse existing dates and times
+                try:
+                    start_dt = datetime.fromisoformat(selected['start'].replace('Z', '+00:00'))
+                    end_dt = datetime.fromisoformat(selected['end'].replace('Z', '+00:00'))
+                    entry_date = datetime.strptime(selected['date'], '%Y-%m-%d').date()
+                except (ValueError, KeyError):
+                    start_dt = datetime.now()
+                    end_dt = datetime.now() + timedelta(hours=1)
+                    entry_date = date.today()
+               
+                # Date and Time
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    new_date = st.date_input("Entry Date", value=entry_date)
+               
+                with col2:
+                    new_start_time = st.time_input("Start Time", value=start_dt.time())
+               
+                with col3:
+                    new_end_time = st.time_input("End Time", value=end_dt.time())
+               
+                # Entry type and notes
+                col1, col2 = st.columns(2)
+                with col1:
+                    new_type = st.selectbox(
+                        "Type",
+                        ["regular", "manual"],
+                        index=0 if selected['type'] == "regular" else 1
+                    )
+               
+                with col2:
+                    new_notes = st.text_area("Notes", value=selected.get('notes', ''))
+               
+                # Custom fields
+                st.markdown("### Custom Fields")
+                custom_fields = selected.get('customfields', {})
+                custom_col1, custom_col2 = st.columns(2)
+                with custom_col1:
+                    new_custom1 = st.text_input("Custom Field 1", value=custom_fields.get("19142", ""))
+               
+                with custom_col2:
+                    new_custom2 = st.text_input("Custom Field 2", value=custom_fields.get("19144", ""))
+               
+                st.markdown('</div>', unsafe_allow_html=True)
+               
+                # Validation before submission
+                new_start_dt = datetime.combine(new_date, new_start_time)
+                new_end_dt = datetime.combine(new_date, new_end_time)
+               
+                if new_end_dt <= new_start_dt:
+                    st.warning("End time must be after start time.")
+               
+                # Submit button
+                submit_col1, submit_col2, submit_col3 = st.columns([2, 2, 1])
+                with submit_col3:
+                    update_button = st.form_submit_button("Update Entry", use_container_width=True)
+               
+                if update_button:
+                    if new_end_dt <= new_start_dt:
+                        st.error("❌ End time must be after start time.")
+                    else:
+                        updated_entry = {
+                            "user_id": int(new_user_id),
+                            "jobcode_id": int(new_jobcode_id),
+                            "type": new_type,
+                            "start": new_start_dt.isoformat(),
+                            "end": new_end_dt.isoformat(),
+                            "date": new_date.isoformat(),
+                            "notes": new_notes,
+                            "customfields": {
+                                "19142": new_custom1,
+                                "19144": new_custom2
+                            }
+                        }
+                       
+                        update_timesheet(selected_id, updated_entry)
+                        st.success("✅ Entry updated. Syncing with TSheets in the background.")
+    else:
+        st.info("No entries available to edit. Please adjust your filters or add new entries.")
@@ -0,0 +1,102 @@
+"""Performance view: API, frame, aggregation and chart timings with JSON and Prometheus export."""
+import pandas as pd
+import streamlit as st
+
+from instrumentation import telemetry
+
+
+def render():
+    """Show the process-wide timings and counters"""
+    st.markdown('<div class="main-header">⚙️ Performance</div>', unsafe_allow_html=True)
+    st.caption("Timings and counters for every session served by this process.")
+   
+    snapshot = telemetry.snapshot()
+    gauges = snapshot['gauges']
+    timers = snapshot['timers']
+   
+    perf_col1, perf_col2, perf_col3, perf_col4 = st.columns(4)
+    with perf_col1:
+        st.metric("API Requests", gauges.get('api_client_requests', 0))
+    with perf_col2:
+        st.metric("API Retries", gauges.get('api_client_retries', 0))
+    with perf_col3:
+        st.metric("Rate Limit Wait", f"{gauges.get('api_client_throttled_seconds', 0):.1f}s")
+    with perf_col4:
+        lookups = gauges.get('derived_cache_hits', 0) + gauges.get('derived_cache_misses', 0)
+        hit_rate = gauges.get('derived_cache_hits', 0) / lookups if lookups else 0
+        st.metric("Aggregate Cache Hit Rate", f"{hit_rate:.0%}")
+    st.caption(
+        f"{gauges.get('dataset_registry_datasets', 0)} shared datasets holding "
+        f"{gauges.get('dataset_registry_timesheets', 0)} timesheets in "
+        f"{gauges.get('dataset_registry_timesheet_bytes', 0) / 2**20:.1f} MB of columns."
+    )
+   
+    # API calls per endpoint, method and status
+    st.markdown('<div class="sub-header">API Calls</div>', unsafe_allow_html=True)
+    api_calls = [timer for timer in timers if timer['name'] == "api_request"]
+    if api_calls:
+        st.dataframe(pd.DataFrame([
+            {
+                "Endpoint": timer['labels'].get('endpoint'),
+                "Method": timer['labels'].get('method'),
+                "Status": timer['labels'].get('status'),
+                "Calls": timer['count'],
+                "Mean (ms)": round(timer['mean_seconds'] * 1000, 1),
+                "Max (ms)": round(timer['max_seconds'] * 1000, 1)
+            }
+            for timer in api_calls
+        ]), use_container_width=True)
+       
+        endpoint_totals = {}
+        for counter in snapshot['counters']:
+            if counter['name'] in ("api_response_bytes", "api_retries"):
+                totals = endpoint_totals.setdefault(counter['labels']['endpoint'], {"Response Bytes": 0, "Retries": 0})
+                totals["Response Bytes" if counter['name'] == "api_response_bytes" else "Retries"] = counter['value']
+        if endpoint_totals:
+            st.dataframe(
+                pd.DataFrame.from_dict(endpoint_totals, orient='index').rename_axis("Endpoint"),
+                use_container_width=True
+            )
+    else:
+        st.info("No API calls recorded yet.")
+   
+    # Frame and index builds, aggregations and charts
+    st.markdown('<div class="sub-header">Hot Paths</div>', unsafe_allow_html=True)
+    hot_paths = [timer for timer in timers if timer['name'] != "api_request"]
+    if hot_paths:
+        st.dataframe(pd.DataFrame([
+            {
+                "Timer": timer['name'],
+                "Labels": ", ".join(f"{key}={value}" for key, value in timer['labels'].items()),
+                "Calls": timer['count'],
+                "Mean (ms)": round(timer['mean_seconds'] * 1000, 1),
+                "Max (ms)": round(timer['max_seconds'] * 1000, 1),
+                "Total (s)": round(timer['total_seconds'], 3)
+            }
+            for timer in hot_paths
+        ]), use_container_width=True)
+    else:
+        st.info("No timings recorded yet.")
+   
+    # Export
+    export_col1, export_col2, export_col3 = st.columns(3)
+    with export_col1:
+        st.download_button(
+            "📥 Download as JSON",
+            data=telemetry.to_json(),
+            file_name="tsheets_metrics.json",
+            mime="application/json",
+            on_click="ignore"
+        )
+    with export_col2:
+        st.download_button(
+            "📥 Download as Prometheus Text",
+            data=telemetry.to_prometheus(),
+            file_name="tsheets_metrics.prom",
+            mime="text/plain",
+            on_click="ignore"
+        )
+    with export_col3:
+        if st.button("Reset Timings"):
+            telemetry.reset()
+            st.rerun()
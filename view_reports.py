@@ -0,0 +1,215 @@
+"""Reports view: the fixed reports and the custom report builder."""
+import plotly.express as px
+import streamlit as st
+
+import timesheet_reports as reports
+from chart_data import MAX_SERIES, top_n, downsample, line_render_mode
+from view_common import rolled_up, download_csv, build_chart, show_chart
+
+
+def render():
+    """Show the selected report"""
+    st.markdown('<div class="main-header">📊 Reports</div>', unsafe_allow_html=True)
+   
+    report_type = st.selectbox(
+        "Select Report Type",
+        ["Hours by User", "Hours by Job Code", "Daily Summary", "Weekly Summary", "Custom Report"]
+    )
+   
+    if st.session_state.timesheets:
+        if report_type == "Hours by User":
+            st.markdown('<div class="sub-header">Hours by User Report</div>', unsafe_allow_html=True)
+           
+            # Group by user
+            user_hours = rolled_up(reports.user_report)
+           
+            # Display table
+            st.dataframe(user_hours, use_container_width=True)
+           
+            # Chart
+            fig = build_chart(
+                "report_hours_by_user", px.bar,
+                top_n(user_hours, 'User', 'Total Hours'),
+                x='User',
+                y='Total Hours',
+                color='Total Hours',
+                text='Total Hours',
+                color_continuous_scale='Blues',
+                labels={'User': 'User', 'Total Hours': 'Total Hours'},
+                height=400
+            )
+            fig.update_layout(xaxis_tickangle=-45)
+            fig.update_traces(texttemplate='%{text:.1f}', textposition='outside')
+            show_chart(fig, "report_hours_by_user")
+           
+            # Export
+            download_csv(user_hours, "hours_by_user.csv", "📥 Download Report as CSV")
+       
+        elif report_type == "Hours by Job Code":
+            st.markdown('<div class="sub-header">Hours by Job Code Report</div>', unsafe_allow_html=True)
+           
+            # Group by job code
+            job_hours = rolled_up(reports.job_report)
+           
+            # Display table
+            st.dataframe(job_hours, use_container_width=True)
+           
+            # Chart
+            fig = build_chart(
+                "report_hours_by_job", px.pie,
+                top_n(job_hours, 'Job Code', 'Total Hours'),
+                values='Total Hours',
+                names='Job Code',
+                hole=0.4,
+                color_discrete_sequence=px.colors.sequential.Blues_r,
+                height=400
+            )
+            fig.update_traces(textposition='inside', textinfo='percent+label')
+            show_chart(fig, "report_hours_by_job")
+           
+            # Export
+            download_csv(job_hours, "hours_by_job_code.csv", "📥 Download Report as CSV")
+       
+        elif report_type == "Daily Summary":
+            st.markdown('<div class="sub-header">Daily Summary Report</div>', unsafe_allow_html=True)
+           
+            # Group by date
+            daily_hours = rolled_up(reports.daily_report)
+           
+            # Display table
+            st.dataframe(daily_hours, use_container_width=True)
+           
+            # Chart
+            daily_points = downsample(daily_hours, 'Date', 'Total Hours')
+            fig = build_chart(
+                "report_daily", px.line,
+                daily_points,
+                x='Date',
+                y='Total Hours',
+                markers=True,
+                render_mode=line_render_mode(daily_points),
+                labels={'Date': 'Date', 'Total Hours': 'Total Hours'},
+                height=400
+            )
+            fig.update_layout(xaxis_title='Date', yaxis_title='Hours')
+            show_chart(fig, "report_daily")
+           
+            # Export
+            download_csv(daily_hours, "daily_summary.csv", "📥 Download Report as CSV")
+       
+        elif report_type == "Weekly Summary":
+            st.markdown('<div class="sub-header">Weekly Summary Report</div>', unsafe_allow_html=True)
+           
+            # Group by year and week
+            weekly_hours = rolled_up(reports.weekly_report)
+           
+            # Display table
+            st.dataframe(weekly_hours[reports.WEEKLY_DISPLAY_COLUMNS], use_container_width=True)
+           
+            # Chart
+            fig = build_chart(
+                "report_weekly", px.bar,
+                weekly_hours.sort_values(['Year', 'Week']),
+                x='Week Label',
+                y='Total Hours',
+                color='Unique Users',
+                text='Total Hours',
+                labels={'Week Label': 'Week', 'Total Hours': 'Total Hours'},
+                height=400
+            )
+            fig.update_layout(xaxis_tickangle=-45)
+            fig.update_traces(texttemplate='%{text:.1f}', textposition='outside')
+            show_chart(fig, "report_weekly")
+           
+            # Export
+            download_csv(weekly_hours[reports.WEEKLY_DISPLAY_COLUMNS], "weekly_summary.csv", "📥 Download Report as CSV")
+       
+        elif report_type == "Custom Report":
+            st.markdown('<div class="sub-header">Custom Report Builder</div>', unsafe_allow_html=True)
+           
+            # Report configuration
+            config_col1, config_col2 = st.columns(2)
+           
+            with config_col1:
+                group_by = st.multiselect(
+                    "Group By",
+                    options=reports.CUSTOM_GROUPS,
+                    default=["User", "Job Code"]
+                )
+           
+            with config_col2:
+                metrics = st.multiselect(
+                    "Metrics",
+                    options=list(reports.CUSTOM_METRICS),
+                    default=["Total Hours", "Entry Count"]
+                )
+           
+            if group_by and metrics:
+                # Generate report
+                custom_report = rolled_up(reports.custom_report, tuple(group_by), tuple(metrics))
+               
+                # Display report
+                st.dataframe(custom_report, use_container_width=True)
+               
+                # Export
+                download_csv(custom_report, "custom_report.csv", "📥 Download Custom Report as CSV")
+               
+                # Visualization options
+                if len(group_by) >= 1 and "Total Hours" in metrics:
+                    viz_type = st.selectbox(
+                        "Visualization Type",
+                        options=["Bar Chart", "Pie Chart", "Line Chart"],
+                        index=0
+                    )
+                   
+                    if viz_type == "Bar Chart":
+                        # At most MAX_SERIES colors, then at most MAX_CATEGORIES bars per color
+                        series = group_by[1] if len(group_by) > 1 else None
+                        bars = custom_report
+                        if series:
+                            bars = top_n(bars, series, "Total Hours", n=MAX_SERIES, by=[group_by[0]])
+                        bars = top_n(bars, group_by[0], "Total Hours", by=[series] if series else ())
+                        fig = build_chart(
+                            "custom_bar", px.bar,
+                            bars,
+                            x=group_by[0],
+                            y="Total Hours",
+                            color=series,
+                            barmode="group",
+                            height=400
+                        )
+                        show_chart(fig, "custom_bar")
+                   
+                    elif viz_type == "Pie Chart":
+                        fig = build_chart(
+                            "custom_pie", px.pie,
+                            top_n(custom_report, group_by[0], "Total Hours"),
+                            values="Total Hours",
+                            names=group_by[0],
+                            height=400
+                        )
+                        show_chart(fig, "custom_pie")
+                   
+                    elif viz_type == "Line Chart" and "Date" in group_by:
+                        date_col = group_by[group_by.index("Date")]
+                        series = group_by[1] if len(group_by) > 1 and group_by[1] != "Date" else None
+                        lines = custom_report
+                        if series:
+                            lines = top_n(lines, series, "Total Hours", n=MAX_SERIES, by=[date_col])
+                        lines = downsample(lines, date_col, "Total Hours", by=series)
+                        fig = build_chart(
+                            "custom_line", px.line,
+                            lines,
+                            x=date_col,
+                            y="Total Hours",
+                            color=series,
+                            markers=True,
+                            render_mode=line_render_mode(lines),
+                            height=400
+                        )
+                        show_chart(fig, "custom_line")
+           
+            else:
+                st.warning("Please select at least one grouping field and one metric.")
+    else:
+        st.info("No timesheet data available for reporting. Please adjust your filters or add new entries.")
@@ -0,0 +1,98 @@
+"""View Timesheets view: the searchable, sortable grid, exports and entry actions."""
+import streamlit as st
+
+import timesheet_reports as reports
+from app_state import get_search_index, find_timesheet, delete_timesheet
+from exports import xlsx_export, parquet_export
+from timesheet_grid import SORT_OPTIONS, filter_positions, display_rows
+from view_common import (
+    get_timesheet_frame,
+    get_sort_orders,
+    rolled_up,
+    timesheet_grid,
+    pick_timesheet,
+    download_csv
+)
+
+
+def render():
+    """Show the timesheet grid with its exports and actions"""
+    st.markdown('<div class="main-header">📋 Timesheet Overview</div>', unsafe_allow_html=True)
+   
+    if st.session_state.timesheets:
+        frame = get_timesheet_frame()
+       
+        # Add search and filter options
+        search_col1, search_col2 = st.columns([3, 1])
+        with search_col1:
+            search_term = st.text_input("Search timesheets", placeholder="Enter user name, job code, or notes... (words are ANDed, use OR for alternatives)")
+       
+        with search_col2:
+            sort_by = st.selectbox("Sort by", SORT_OPTIONS)
+       
+        # Sorting is a lookup of the presorted permutation; searching masks it
+        matching_ids = get_search_index().search(search_term) if search_term else None
+        positions = filter_positions(frame, get_sort_orders().positions(sort_by), matching_ids)
+       
+        # Only the visible page is formatted and sent to the browser
+        visible = timesheet_grid(frame, positions, "timesheet_grid")
+       
+        # Export options
+        export_col1, export_col2 = st.columns([3, 1])
+        with export_col1:
+            download_csv(
+                frame, "timesheets_export.csv", "📥 Download as CSV", transform=display_rows, positions=positions
+            )
+        with export_col2:
+            # Payroll workbook and Parquet cover the whole loaded period, not the search results
+            st.download_button(
+                "📊 Excel Workbook",
+                data=xlsx_export(frame, {
+                    "By User": rolled_up(reports.user_report),
+                    "By Job Code": rolled_up(reports.job_report),
+                    "Weekly": rolled_up(reports.weekly_report)[reports.WEEKLY_DISPLAY_COLUMNS]
+                }),
+                file_name="timesheets.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore",
+                use_container_width=True
+            )
+            st.download_button(
+                "🗄️ Parquet",
+                data=parquet_export(frame),
+                file_name="timesheets.parquet",
+                mime="application/vnd.apache.parquet",
+                on_click="ignore",
+                use_container_width=True
+            )
+       
+        # Actions for selected timesheet
+        st.markdown('<div class="sub-header">Timesheet Actions</div>', unsafe_allow_html=True)
+        selected_id = pick_timesheet(visible, "Select Timesheet ID for Actions", "action_entry")
+       
+        action_col1, action_col2, action_col3 = st.columns(3)
+        with action_col1:
+            if st.button("View Details", use_container_width=True):
+                selected_entry = find_timesheet(selected_id)
+                if selected_entry:
+                    st.json(selected_entry)
+       
+        with action_col2:
+            if st.button("Edit Entry", use_container_width=True):
+                st.session_state.view_mode = "Edit Entry"
+                st.rerun()
+       
+        with action_col3:
+            if st.button("Delete Entry", use_container_width=True):
+                if st.session_state.auth_token:
+                    confirm = st.warning("Are you sure you want to delete this entry? This action cannot be undone.")
+                    confirm_col1, confirm_col2 = st.columns(2)
+                    with confirm_col1:
+                        if st.button("Yes, Delete", use_container_width=True):
+                            delete_timesheet(selected_id)
+                            st.success("✅ Entry deleted. Syncing with TSheets in the background.")
+                    with confirm_col2:
+                        if st.button("Cancel", use_container_width=True):
+                            st.rerun()
+    else:
+        st.info("No timesheet data available for the selected filters.")
@@ -0,0 +1,175 @@
+"""Write-behind queue for timesheet creates, updates and deletes.
+
+The app applies a mutation to its in-memory data as soon as it is
+submitted and hands the request to this queue. A worker thread sends the
+queued writes through ``bulk_mutate_timesheets`` in submission order,
+batching consecutive writes of the same kind, and records each outcome.
+The app drains the outcomes on a later rerun to confirm every change with
+the server's record or roll it back.
+
+New entries get a negative placeholder id until the server assigns one;
+updates and deletes queued against a placeholder are sent with the real
+id once the create has gone through.
+"""
+import itertools
+import threading
+from datetime import datetime
+
+from tsheets_api import TSheetsAPIError
+from tsheets_async import bulk_mutate_timesheets
+
+
+def is_local_id(entry_id):
+    """True for the placeholder ids given to entries the server has not created yet"""
+    return str(entry_id).startswith('-')
+
+
+def entry_duration(entry):
+    """Seconds between an entry's ``start`` and ``end``, or its ``duration`` if they do not parse"""
+    try:
+        start = datetime.fromisoformat(str(entry['start']).replace('Z', '+00:00'))
+        end = datetime.fromisoformat(str(entry['end']).replace('Z', '+00:00'))
+    except (KeyError, ValueError):
+        return entry.get('duration', 0)
+    return int((end - start).total_seconds())
+
+
+def optimistic_entry(entry_id, changes, previous=None):
+    """The entry as it will look once the server applies ``changes``"""
+    entry = {**(previous or {}), **changes, "id": int(entry_id)}
+    entry["duration"] = entry_duration(entry)
+    return entry
+
+
+class PendingWrite:
+    """A queued mutation with the local state needed to reconcile it.
+
+    ``local`` is the optimistic entry shown meanwhile (``None`` for
+    deletes). Once sent, either ``record`` or ``error`` is set.
+    """
+
+    def __init__(self, method, item, local_id, local=None):
+        self.method = method
+        self.item = item
+        self.local_id = str(local_id)
+        self.local = local
+        self.record = None
+        self.error = None
+
+
+class WriteBehindQueue:
+    """Per-session queue of timesheet writes sent by a background thread"""
+
+    def __init__(self, token):
+        self.token = token
+        self._queued = []
+        self._sending = []
+        self._completed = []
+        self._server_ids = {}
+        self._local_ids = itertools.count(-1, -1)
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def new_local_id(self):
+        """Return a fresh placeholder id for an entry being created"""
+        return str(next(self._local_ids))
+
+    def submit(self, method, item, local_id, local=None):
+        """Queue a write and make sure the worker thread is running"""
+        write = PendingWrite(method, item, local_id, local)
+        with self._condition:
+            self._queued.append(write)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="timesheet-write-behind", daemon=True)
+                self._worker.start()
+        return write
+
+    def resolve_id(self, entry_id):
+        """Map a placeholder id to the server id once the create has gone through"""
+        with self._condition:
+            return self._server_ids.get(str(entry_id), str(entry_id))
+
+    def pending(self):
+        """Writes not yet answered by the server, oldest first"""
+        with self._condition:
+            return self._sending + self._queued
+
+    def unreconciled(self):
+        """Writes not drained yet, answered or not, oldest first"""
+        with self._condition:
+            return self._completed + self._sending + self._queued
+
+    def has_completed(self):
+        with self._condition:
+            return bool(self._completed)
+
+    def drain(self):
+        """Return and forget the writes the server has answered since the last drain"""
+        with self._condition:
+            completed, self._completed = self._completed, []
+        return completed
+
+    def _next_batch(self):
+        """Pop the longest run of queued writes with the same method and distinct entries"""
+        batch, seen = [], set()
+        while self._queued:
+            write = self._queued[0]
+            if batch and (write.method != batch[0].method or write.local_id in seen):
+                break
+            batch.append(self._queued.pop(0))
+            seen.add(write.local_id)
+        return batch
+
+    def _run(self):
+        try:
+            while True:
+                with self._condition:
+                    if not self._queued:
+                        self._worker = None
+                        return
+                    batch = self._next_batch()
+                    self._sending = batch
+                try:
+                    self._send(batch)
+                except Exception as e:
+                    # Fail the whole batch rather than the thread, so later writes still go out;
+                    # the next sync brings back whatever the server did apply
+                    error = e if isinstance(e, TSheetsAPIError) else TSheetsAPIError(f"Sending the change failed: {e}")
+                    for write in batch:
+                        write.error = error
+                finally:
+                    with self._condition:
+                        self._sending = []
+                        self._completed.extend(batch)
+        finally:
+            # However the loop ends, let the next submit start a worker
+            with self._condition:
+                if self._worker is threading.current_thread():
+                    self._worker = None
+
+    def _send(self, batch):
+        method = batch[0].method
+        payloads = {}
+        for write in batch:
+            entry_id = write.item.get('id')
+            if entry_id is not None and is_local_id(entry_id):
+                entry_id = self._server_ids.get(str(entry_id))
+                if entry_id is None:
+                    write.error = TSheetsAPIError("The entry was never created on TSheets")
+                    continue
+            payload = dict(write.item) if entry_id is None else dict(write.item, id=int(entry_id))
+            payloads[id(payload)] = (payload, write)
+
+        if not payloads:
+            return
+        succeeded, failed = bulk_mutate_timesheets(
+            self.token, method, [payload for payload, _ in payloads.values()]
+        )
+        for payload, record in succeeded:
+            write = payloads[id(payload)][1]
+            write.record = record
+            if method == "POST":
+                with self._condition:
+                    self._server_ids[write.local_id] = str(record['id'])
+        for payload, error in failed:
+            payloads[id(payload)][1].error = error